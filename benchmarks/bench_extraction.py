@@ -0,0 +1,86 @@
+"""
+Compare thread vs process extraction throughput on synthetic work.
+
+Each synthetic "extraction" parses a large player-response-like JSON blob and
+runs a pure-Python descrambling loop (stand-in for signature / n-parameter JS
+interpretation), then reduces the result with summarize_info() exactly like a
+real fetch. No network access is needed.
+
+Usage:
+    python benchmarks/bench_extraction.py [--urls 64] [--workers 4]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction import ThreadExtractor, ProcessExtractor, summarize_info  # noqa: E402
+
+HEIGHTS = [144, 240, 360, 480, 720, 1080, 1440, 2160]
+
+
+def _player_response(seed: int) -> str:
+    rnd = random.Random(seed)
+    formats = []
+    for i in range(400):
+        if i % 5 == 0:
+            formats.append({'format_id': f"a{i}", 'acodec': 'opus', 'vcodec': 'none',
+                            'abr': rnd.uniform(48, 160), 'url': "https://example.invalid/" + "x" * 600})
+        else:
+            formats.append({'format_id': f"v{i}", 'acodec': 'none', 'vcodec': 'avc1',
+                            'height': rnd.choice(HEIGHTS), 'tbr': rnd.uniform(100, 9000),
+                            'filesize': rnd.choice([None, rnd.randint(10**6, 10**9)]),
+                            'url': "https://example.invalid/" + "y" * 600})
+    return json.dumps({'title': f"Synthetic video {seed}", 'duration': rnd.randint(30, 7200),
+                       'formats': formats, 'storyboards': ["z" * 2000] * 50})
+
+
+def _descramble(sig: str, rounds: int = 60000) -> str:
+    chars = list(sig)
+    for r in range(rounds):
+        j = (r * 31 + len(chars)) % len(chars)
+        chars[0], chars[j] = chars[j], chars[0]
+        if r % 7 == 0:
+            chars.reverse()
+    return "".join(chars)
+
+
+def synthetic_extract(url):
+    seed = int(url.rsplit("/", 1)[-1])
+    info = json.loads(_player_response(seed))
+    _descramble(f"{seed:08d}abcdefghijklmnopqrstuvwxyz")
+    return summarize_info(info)
+
+
+def run(extractor, urls):
+    extractor.fetch(urls[0])  # warm up the pool (process start-up is a one-off cost)
+    start = time.perf_counter()
+    results = extractor.map(urls)
+    elapsed = time.perf_counter() - start
+    extractor.shutdown()
+    assert all(title for title, _ in results)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--urls", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    urls = [f"https://example.invalid/watch/{i}" for i in range(args.urls)]
+    print(f"{args.urls} synthetic extractions, {args.workers} workers")
+    for name, extractor in (
+        ("thread", ThreadExtractor(args.workers, func=synthetic_extract)),
+        ("process", ProcessExtractor(args.workers, func=synthetic_extract)),
+    ):
+        elapsed = run(extractor, urls)
+        print(f"  {name:<8} {elapsed:7.2f}s  {args.urls / elapsed:7.1f} urls/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Simulate the download queue under each ordering policy and report completion times.
+
+Jobs get a fixed share of the link (bandwidth / slots) while running, which is
+what the scheduler's shared rate limiter converges to. Two workloads:
+
+  batch   everything queued at once, a 20 GiB lecture at the head
+  stream  jobs keep arriving (Poisson), mostly clips with a few huge ones
+
+Completion time = finish - queued. Pure simulation, no network needed.
+
+Usage:
+    python benchmarks/bench_ordering.py [--jobs 300] [--slots 2] [--mibps 10]
+"""
+import argparse
+import heapq
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ordering import POLICIES, pick_next  # noqa: E402
+
+MiB = 1024 * 1024
+GiB = 1024 * MiB
+
+
+def _random_size(rnd):
+    r = rnd.random()
+    if r < 0.80:
+        return rnd.randint(10 * MiB, 60 * MiB)      # clips
+    if r < 0.95:
+        return rnd.randint(200 * MiB, 1 * GiB)      # episodes
+    return rnd.randint(5 * GiB, 20 * GiB)           # lectures
+
+
+def batch_workload(n, rnd):
+    jobs = [(0.0, 20 * GiB)]
+    jobs += [(0.0, _random_size(rnd)) for _ in range(n - 1)]
+    return jobs
+
+
+def stream_workload(n, rnd, load, per_slot, slots):
+    # Pick the arrival rate so offered load ~= `load` of link capacity
+    sizes = [_random_size(rnd) for _ in range(n)]
+    mean_service = sum(sizes) / n / per_slot
+    rate = load * slots / mean_service
+    t, jobs = 0.0, []
+    for size in sizes:
+        jobs.append((t, size))
+        t += rnd.expovariate(rate)
+    return jobs
+
+
+def simulate(workload, policy, slots, per_slot):
+    arrivals = [{'seq': i, 'queued_at': t, 'size_bytes': size} for i, (t, size) in enumerate(workload)]
+    pending, running, done = [], [], []
+    t, i = 0.0, 0
+    while i < len(arrivals) or pending or running:
+        while pending and len(running) < slots:
+            job = pending.pop(pick_next(pending, policy, now=t))
+            heapq.heappush(running, (t + job['size_bytes'] / per_slot, job['seq'], job))
+        next_arrival = arrivals[i]['queued_at'] if i < len(arrivals) else math.inf
+        next_finish = running[0][0] if running else math.inf
+        if next_arrival <= next_finish:
+            t = next_arrival
+            pending.append(arrivals[i])
+            i += 1
+        else:
+            t, _, job = heapq.heappop(running)
+            done.append(t - job['queued_at'])
+    return done
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(math.ceil(p / 100.0 * len(ordered))) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=300)
+    parser.add_argument("--slots", type=int, default=2)
+    parser.add_argument("--mibps", type=float, default=10.0, help="total bandwidth in MiB/s")
+    parser.add_argument("--load", type=float, default=0.8, help="offered load for the stream workload")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    per_slot = args.mibps * MiB / args.slots
+    workloads = {
+        "batch": batch_workload(args.jobs, random.Random(args.seed)),
+        "stream": stream_workload(args.jobs, random.Random(args.seed), args.load, per_slot, args.slots),
+    }
+    for name, workload in workloads.items():
+        print(f"{name}: {args.jobs} jobs, {args.slots} slots, {args.mibps:g} MiB/s  (minutes)")
+        print(f"  {'policy':<8} {'mean':>9} {'p95':>9} {'max':>9}")
+        for policy in POLICIES:
+            done = simulate(workload, policy, args.slots, per_slot)
+            print(f"  {policy:<8} {sum(done) / len(done) / 60:9.1f} "
+                  f"{percentile(done, 95) / 60:9.1f} {max(done) / 60:9.1f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import os
+
+import yt_dlp
+
+# ======================== Size Estimation Helpers ========================
+
+def sizeof_fmt(num, suffix='B'):
+    if num is None:
+        return "?"
+    num = float(num)
+    for unit in ['', 'Ki', 'Mi', 'Gi', 'Ti', 'Pi', 'Ei', 'Zi']:
+        if abs(num) < 1024.0:
+            return f"{num:3.1f}{unit}{suffix}"
+        num /= 1024.0
+    return f"{num:.1f}Yi{suffix}"
+
+def estimate_size_bytes_from_bitrate(fmt: dict, duration: float | None) -> int | None:
+    """
+    Estimate size using bitrate fields if filesize is missing.
+    yt-dlp 'tbr', 'vbr', 'abr' are in Kbits/s (usually). Use duration (s) to estimate.
+    """
+    if not duration:
+        return None
+    # Prefer 'tbr' (total bitrate); else vbr/abr depending on stream kind
+    tbr = fmt.get('tbr')  # Kbits/s
+    # If this is clearly audio-only, use abr; if video-only, use vbr when present
+    if tbr is None:
+        if fmt.get('acodec') not in (None, 'none'):
+            tbr = fmt.get('abr')
+        if tbr is None and fmt.get('vcodec') not in (None, 'none'):
+            tbr = fmt.get('vbr')
+    if not tbr:
+        return None
+    # Convert Kbits/s -> bytes: kbps * 1000 / 8 * seconds
+    try:
+        return int(float(tbr) * 1000.0 / 8.0 * float(duration))
+    except Exception:
+        return None
+
+def resolve_stream_size(fmt: dict, duration: float | None) -> int | None:
+    """Return best known or estimated size for a single format."""
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    if size:
+        return int(size)
+    return estimate_size_bytes_from_bitrate(fmt, duration)
+
+def choose_best_audio(formats: list[dict]) -> dict | None:
+    """Pick an audio stream likely to be best for muxing (largest size or highest abr)."""
+    best = None
+    for f in formats:
+        if f.get('acodec') not in (None, 'none'):
+            # Prefer known size; fallback to abr
+            size = f.get('filesize') or f.get('filesize_approx')
+            abr = f.get('abr') or 0
+            key = (1 if size else 0, int(size or 0), float(abr))
+            if best is None or key > best[0]:
+                best = (key, f)
+    return best[1] if best else None
+
+# ======================== Format Summaries ========================
+
+def summarize_info(info: dict):
+    """
+    Reduce a full yt-dlp info dict to the compact summary the UI needs.
+
+    Returns:
+      title (str),
+      options (list of dict): [{'label': '1080p — ~245.3 MiB', 'res': '1080p', 'size_bytes': 257123456}, ...]
+      Includes 'Highest (best available)' as first option with a size estimate when possible.
+    """
+    formats = info.get("formats", [])
+    title = info.get("title", "Unknown Title")
+    duration = info.get("duration")  # seconds (may be None)
+
+    best_audio_fmt = choose_best_audio(formats)
+
+    # collect unique heights
+    heights = sorted({f.get("height") for f in formats if f.get("height")}, key=int)
+    options = []
+
+    for h in heights:
+        # best video for this height (prefer known size; else higher tbr)
+        best_video_fmt = None
+        best_score = (-1, -1.0)  # (has_size, tbr)
+        for f in formats:
+            if f.get("height") == h and f.get('vcodec') not in (None, 'none'):
+                has_size = 1 if (f.get('filesize') or f.get('filesize_approx')) else 0
+                tbr = float(f.get('tbr') or f.get('vbr') or 0.0)
+                score = (has_size, tbr)
+                if best_video_fmt is None or score > best_score:
+                    best_video_fmt = f
+                    best_score = score
+        if not best_video_fmt:
+            continue
+
+        v_size = resolve_stream_size(best_video_fmt, duration) or 0
+        a_size = resolve_stream_size(best_audio_fmt, duration) if best_audio_fmt else 0
+        total_size = (v_size or 0) + (a_size or 0)
+        label = f"{h}p — {sizeof_fmt(total_size) if total_size else '?'}"
+        options.append({'label': label, 'res': f"{h}p", 'size_bytes': total_size or None})
+
+    options_sorted = sorted(options, key=lambda x: int(x['res'].replace('p', '')))
+    # Build "Highest" with estimated size from the max height option if any
+    highest_entry = None
+    if options_sorted:
+        highest_entry = {
+            'label': f"Highest (best available) — ~{options_sorted[-1]['label'].split('~')[-1]}",
+            'res': 'Highest',
+            'size_bytes': options_sorted[-1]['size_bytes']
+        }
+
+    if options_sorted:
+        return title, ([highest_entry] if highest_entry else [{'label': 'Highest (best available)', 'res': 'Highest', 'size_bytes': None}]) + options_sorted
+    # If nothing matched, still return title and empty options
+    return title, []
+
+def extract_summary(url):
+    """
+    Run yt-dlp metadata extraction for one URL and return (title, options).
+
+    Top-level so it can be pickled into worker processes; only the compact
+    summary crosses the process boundary, never the full info dict.
+    Returns (None, []) on any failure.
+    """
+    try:
+        ydl_opts = {'quiet': True, 'noplaylist': True}
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+            return summarize_info(info)
+    except Exception:
+        return None, []
+
+# ======================== Extraction Backends ========================
+
+class _PoolExtractor(ABC):
+    """Lazily creates an executor and runs the extraction function on it."""
+
+    def __init__(self, max_workers: int | None = None, func=extract_summary):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.func = func
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _make_pool(self):
+        """Build a fresh concurrent.futures executor."""
+
+    def _current_pool(self):
+        """Return the pool to submit to. Called with `_lock` held."""
+        if self._pool is None:
+            self._pool = self._make_pool()
+        return self._pool
+
+    def _submit(self, url):
+        # Submit under the lock so a concurrent recycle can't shut the pool down in between
+        with self._lock:
+            pool = self._current_pool()
+            return pool, pool.submit(self.func, url)
+
+    def fetch(self, url):
+        """Extract a single URL. Returns (title, options) or (None, [])."""
+        return self._submit(url)[1].result()
+
+    def map(self, urls):
+        """Extract many URLs concurrently, preserving input order."""
+        futures = [self._submit(url)[1] for url in urls]
+        return [f.result() for f in futures]
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+class ThreadExtractor(_PoolExtractor):
+    """Runs extraction on threads. Cheap to start, but the GIL serializes the CPU-bound parts."""
+
+    def _make_pool(self):
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="extract")
+
+
+class ProcessExtractor(_PoolExtractor):
+    """
+    Runs extraction in worker processes so JSON parsing and JS interpretation
+    use every core. The pool is replaced after roughly `max_tasks_per_child`
+    jobs per worker to cap memory growth from yt-dlp's per-process caches.
+    """
+
+    def __init__(self, max_workers: int | None = None, func=extract_summary, max_tasks_per_child: int | None = 25):
+        super().__init__(max_workers, func)
+        self.max_tasks_per_child = max_tasks_per_child
+        self._submitted = 0
+
+    def _make_pool(self):
+        # Always spawn: forking a process that already runs Tk, scheduler and API
+        # threads can deadlock the child, and spawn matches the frozen/Windows build.
+        # ProcessPoolExecutor(max_tasks_per_child=...) can deadlock on Python 3.11
+        # when every worker retires at once, so recycle whole pools instead.
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _current_pool(self):
+        if (self._pool is not None and self.max_tasks_per_child
+                and self._submitted >= self.max_tasks_per_child * self.max_workers):
+            # Queued work still finishes on the old pool; its workers exit afterwards
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        if self._pool is None:
+            self._pool = self._make_pool()
+            self._submitted = 0
+        self._submitted += 1
+        return self._pool
+
+    def _submit(self, url):
+        with self._lock:
+            pool = self._current_pool()
+            try:
+                return pool, pool.submit(self.func, url)
+            except BrokenProcessPool:
+                # The pool broke before we could submit: replace it and retry once
+                self._pool = None
+                pool.shutdown(wait=False)
+                pool = self._current_pool()
+                return pool, pool.submit(self.func, url)
+
+    def _discard(self, pool):
+        """Forget `pool` if it is still the current one; other pools' futures are left alone."""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
+
+    def fetch(self, url):
+        pool, future = self._submit(url)
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            # A worker died (crash / OOM kill): drop that pool so the next call starts fresh
+            self._discard(pool)
+            return None, []
+
+    def map(self, urls):
+        submitted = [self._submit(url) for url in urls]
+        results = []
+        for pool, future in submitted:
+            try:
+                results.append(future.result())
+            except BrokenProcessPool:
+                self._discard(pool)
+                results.append((None, []))
+        return results
+
+
+def make_extractor(backend: str = "process", max_workers: int | None = None, max_tasks_per_child: int | None = 25):
+    """Build an extraction backend by name: 'process' or 'thread'."""
+    if backend == "process":
+        return ProcessExtractor(max_workers, max_tasks_per_child=max_tasks_per_child)
+    if backend == "thread":
+        return ThreadExtractor(max_workers)
+    raise ValueError(f"Unknown extraction backend: {backend!r}")
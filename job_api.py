@@ -0,0 +1,436 @@
+import asyncio
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+import uuid
+from http import HTTPStatus
+from urllib.parse import parse_qs
+
+from ordering import next_seq
+
+# ======================== Local HTTP/JSON Job API ========================
+#
+#   POST   /jobs              {"url": ...} or {"urls": [...]}, optional
+#                             "resolution" ("720p", "highest") and "audio_only";
+#                             a URL that already failed, was canceled or is
+#                             idle is analyzed and queued again
+#   GET    /jobs              list all jobs (GUI-added ones included)
+#   GET    /jobs/<id>         one job with progress
+#   DELETE /jobs/<id>         cancel (also POST /jobs/<id>/cancel)
+#   GET    /events[?job=id]   Server-Sent Events: one "job" event per change
+#   GET    /status            active profile, ordering policy, queue counts
+#
+# Only local, non-browser clients are served: every request needs the
+# install's token in X-Job-Token and a Host of 127.0.0.1/localhost on our
+# port, any Origin header is refused (no cross-site requests, no DNS
+# rebinding), and POST/DELETE must be sent as application/json.
+#
+# Everything runs on one asyncio loop in a background thread. Download
+# threads only hand events over with call_soon_threadsafe (rate-limited per
+# job), so pollers and slow SSE clients never block a download.
+
+MAX_BODY = 1024 * 1024
+PROGRESS_INTERVAL = 0.25   # min seconds between progress events for one job
+EVENT_QUEUE_SIZE = 256     # per SSE client; oldest events are dropped when full
+KEEPALIVE_SECS = 15
+IDLE_TIMEOUT_SECS = 60
+TOKEN_HEADER = 'x-job-token'
+RESUBMITTABLE = ('idle', 'error', 'canceled')  # states a repeated POST /jobs re-queues
+
+
+def load_token(path: str) -> str:
+    """Read the API token from `path`, creating it (owner-only) on first run."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            token = f.read().strip()
+        if token:
+            return token
+    except FileNotFoundError:
+        pass
+    token = secrets.token_urlsafe(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(token + "\n")
+    return token
+
+
+def job_id(job: dict) -> str:
+    """Stable id for a job dict (assigned on first use, so GUI jobs get one too)."""
+    return job.setdefault('id', uuid.uuid4().hex[:12])
+
+def job_to_dict(job: dict) -> dict:
+    progress = dict(job.get('progress') or {})
+    total, downloaded = progress.get('total'), progress.get('downloaded')
+    progress['percent'] = round(downloaded / total * 100.0, 1) if total and downloaded is not None else None
+    return {
+        'id': job_id(job),
+        'url': job['url'],
+        'title': job.get('title'),
+        'resolution': job.get('res_label'),
+        'size_bytes': job.get('size_bytes'),
+        'audio_only': bool(job.get('audio_only')),
+        'pinned': job.get('pinned') is not None,
+        'state': job.get('state', 'idle'),
+        'status': job.get('status'),
+        'progress': progress,
+        'filepath': job.get('filepath'),
+    }
+
+def pick_option(options: list[dict], resolution: str | None) -> dict:
+    """Match '720p' / 'highest' against fetch_video_info options; fall back to Highest."""
+    wanted = (resolution or 'highest').lower()
+    for o in options:
+        if o['res'].lower() == wanted:
+            return o
+    return options[0]
+
+
+class APIError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class JobAPI:
+    """
+    Embedded HTTP API over the same job list, extractor and scheduler as the GUI.
+
+    `jobs` is the shared list of job dicts (main.videos_list); new jobs are
+    appended to it and reported through on_job_added(job) so the GUI can show
+    them. `get_save_path()` returns the folder downloads go to and is called
+    from the API thread. Every request must carry `token` (see load_token).
+    """
+
+    def __init__(self, scheduler, extractor, jobs: list, get_save_path, *, token: str,
+                 host: str = "127.0.0.1", port: int = 8765, on_job_added=None):
+        self.scheduler = scheduler
+        self.extractor = extractor
+        self.jobs = jobs
+        self.get_save_path = get_save_path
+        self.host = host
+        self.port = port
+        self.token = token
+        self.on_job_added = on_job_added or (lambda job: None)
+
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._stopped = None
+        self._error = None
+        self._subscribers = set()   # (asyncio.Queue, job id filter or None)
+        self._last_sent = {}        # job id -> (state, monotonic time)
+        self._trailing = set()      # job ids with a delayed "latest state" event pending
+        self._tasks = {}            # job id -> its current analysis task
+
+    # ---------- lifecycle ----------
+
+    def start(self) -> int:
+        """Start serving in a background thread. Returns the bound port; raises OSError if it is taken."""
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._serve()), daemon=True, name="job-api")
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        self.scheduler.listeners.append(self._on_job_changed)
+        return self.port
+
+    def stop(self):
+        if self._thread is None:
+            return
+        if self._on_job_changed in self.scheduler.listeners:
+            self.scheduler.listeners.remove(self._on_job_changed)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        try:
+            server = await asyncio.start_server(self._handle, self.host, self.port, backlog=512)
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+            return
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with server:
+            await self._stopped.wait()
+
+    # ---------- events ----------
+
+    def _on_job_changed(self, job):
+        """Scheduler listener; runs on download threads."""
+        if not self._subscribers:
+            return
+        jid = job_id(job)
+        state, now = job.get('state'), time.monotonic()
+        last = self._last_sent.get(jid)
+        if last and last[0] == state and now - last[1] < PROGRESS_INTERVAL:
+            # Too soon: make sure the latest state still goes out when the window ends
+            if jid not in self._trailing:
+                self._trailing.add(jid)
+                delay = PROGRESS_INTERVAL - (now - last[1])
+                self._loop.call_soon_threadsafe(self._loop.call_later, delay, self._flush, job)
+            return
+        self._last_sent[jid] = (state, now)
+        self._loop.call_soon_threadsafe(self._broadcast, job_to_dict(job))
+
+    def _flush(self, job):
+        """Send a job's current state after a throttled change (loop thread)."""
+        self._trailing.discard(job_id(job))
+        self._publish(job)
+
+    def _broadcast(self, event):
+        for queue, only in list(self._subscribers):
+            if only and event['id'] != only:
+                continue
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def _publish(self, job):
+        """Publish from the loop thread (API-side changes such as analysis)."""
+        self._last_sent[job_id(job)] = (job.get('state'), time.monotonic())
+        self._broadcast(job_to_dict(job))
+
+    # ---------- HTTP plumbing ----------
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT_SECS)
+                if not line:
+                    break
+                try:
+                    method, target, version = line.decode('latin-1').split()
+                except ValueError:
+                    await self._send(writer, 400, {'error': "Malformed request line"}, False)
+                    break
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = h.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._send(writer, 400, {'error': "Invalid Content-Length"}, False)
+                    break
+                if length > MAX_BODY:
+                    await self._send(writer, 413, {'error': "Request body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                try:
+                    self._check_request(method, headers)
+                except APIError as e:
+                    await self._send(writer, e.status, {'error': str(e)}, False)
+                    break
+
+                path, _, query = target.partition('?')
+                if method == 'GET' and path.rstrip('/') == '/events':
+                    only = parse_qs(query).get('job', [None])[0]
+                    await self._stream_events(writer, only)
+                    break
+                try:
+                    status, payload = await self._route(method, path, body)
+                except APIError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except Exception as e:
+                    status, payload = 500, {'error': str(e)}
+                await self._send(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            pass  # loop shutting down with the client still connected
+        finally:
+            writer.close()
+
+    def _check_request(self, method, headers):
+        """Refuse anything that isn't a local client holding the token."""
+        if headers.get('host', '').lower() not in {f"127.0.0.1:{self.port}", f"localhost:{self.port}"}:
+            raise APIError(403, "Host not allowed")
+        if 'origin' in headers:
+            raise APIError(403, "Cross-origin requests are not allowed")
+        if not hmac.compare_digest(headers.get(TOKEN_HEADER, '').encode(), self.token.encode()):
+            raise APIError(401, "Missing or invalid X-Job-Token")
+        if method in ('POST', 'DELETE'):
+            content_type = headers.get('content-type', '').partition(';')[0].strip().lower()
+            if content_type != 'application/json':
+                raise APIError(415, "Content-Type must be application/json")
+
+    async def _send(self, writer, status: int, payload, keep_alive: bool):
+        body = json.dumps(payload).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def _stream_events(self, writer, only):
+        queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+        sub = (queue, only)
+        self._subscribers.add(sub)
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                         b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n")
+            # Start with the current state so clients don't need a separate GET
+            for job in list(self.jobs):
+                if only is None or job_id(job) == only:
+                    writer.write(self._sse(job_to_dict(job)))
+            await writer.drain()
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), KEEPALIVE_SECS)
+                    writer.write(self._sse(event))
+                except asyncio.TimeoutError:
+                    writer.write(b": keep-alive\n\n")
+                await writer.drain()
+        finally:
+            self._subscribers.discard(sub)
+
+    @staticmethod
+    def _sse(event) -> bytes:
+        return f"event: job\ndata: {json.dumps(event)}\n\n".encode('utf-8')
+
+    # ---------- routes ----------
+
+    async def _route(self, method, path, body):
+        parts = [p for p in path.split('/') if p]
+        if parts == ['jobs']:
+            if method == 'GET':
+                return 200, {'jobs': [job_to_dict(j) for j in list(self.jobs)]}
+            if method == 'POST':
+                return 202, {'jobs': self._submit(self._json(body))}
+        elif len(parts) == 2 and parts[0] == 'jobs':
+            job = self._find(parts[1])
+            if method == 'GET':
+                return 200, job_to_dict(job)
+            if method == 'DELETE':
+                return 200, self._cancel(job)
+        elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'cancel':
+            if method == 'POST':
+                return 200, self._cancel(self._find(parts[1]))
+        elif parts == ['status']:
+            if method == 'GET':
+                return 200, self._status()
+        else:
+            raise APIError(404, "Not found")
+        raise APIError(405, "Method not allowed")
+
+    @staticmethod
+    def _json(body):
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            raise APIError(400, "Body must be JSON")
+        if not isinstance(data, dict):
+            raise APIError(400, "Body must be a JSON object")
+        return data
+
+    def _find(self, jid):
+        for job in list(self.jobs):
+            if job_id(job) == jid:
+                return job
+        raise APIError(404, f"No job with id {jid!r}")
+
+    def _status(self):
+        active, queued = self.scheduler.counts()
+        profile = self.scheduler.profile or self.scheduler.schedule.active()
+        return {'profile': profile.describe(), 'policy': self.scheduler.policy,
+                'running': self.scheduler.running, 'active': active, 'queued': queued}
+
+    def _submit(self, data):
+        urls = data.get('urls') if 'urls' in data else [data.get('url')]
+        if not isinstance(urls, list) or not urls or not all(isinstance(u, str) and u.strip() for u in urls):
+            raise APIError(400, "Provide 'url' or a non-empty 'urls' list")
+        resolution = data.get('resolution')
+        audio_only = bool(data.get('audio_only'))
+
+        result = []
+        for url in (u.strip() for u in urls):
+            existing = next((j for j in list(self.jobs) if j['url'] == url), None)
+            if existing is not None and existing.get('state', 'idle') not in RESUBMITTABLE:
+                result.append({**job_to_dict(existing), 'duplicate': True})
+                continue
+            if existing is not None:
+                existing['audio_only'] = audio_only
+                existing['progress'] = None
+                self.scheduler.notify(existing, state="analyzing", status="Analyzing...")
+                self._analyze(existing, resolution)
+                result.append(job_to_dict(existing))
+                continue
+            job = {
+                "id": uuid.uuid4().hex[:12],
+                "url": url,
+                "title": url,
+                "res_label": "Analyzing...",
+                "size_bytes": None,
+                "status": "Analyzing...",
+                "state": "analyzing",
+                "filepath": None,
+                "iid": None,
+                "seq": next_seq(),
+                "pinned": None,
+                "audio_only": audio_only,
+            }
+            self.jobs.append(job)
+            self.on_job_added(job)
+            self._publish(job)
+            self._analyze(job, resolution)
+            result.append(job_to_dict(job))
+        return result
+
+    def _analyze(self, job, resolution):
+        jid = job_id(job)
+        task = asyncio.get_running_loop().create_task(self._prepare(job, resolution))
+        self._tasks[jid] = task  # a resubmit supersedes any analysis still in flight
+        task.add_done_callback(lambda t: self._tasks.pop(jid) if self._tasks.get(jid) is t else None)
+
+    async def _prepare(self, job, resolution):
+        """Fetch title/options on the extraction backend, then hand the job to the scheduler."""
+        current = asyncio.current_task()
+        try:
+            title, options = await asyncio.get_running_loop().run_in_executor(None, self.extractor.fetch, job['url'])
+            if (self._tasks.get(job_id(job)) is not current or job.get('state') != 'analyzing'
+                    or not any(j is job for j in self.jobs)):
+                return  # canceled, deleted or resubmitted meanwhile
+            if not title:
+                self.scheduler.notify(job, state="error", status="Error")
+                return
+            job['title'] = title
+            if job.get('audio_only'):
+                job['res_label'] = "Audio only (mp3)"
+            elif options:
+                selected = pick_option(options, resolution)
+                job['res_label'], job['size_bytes'] = selected['label'], selected['size_bytes']
+            else:
+                # Direct media links have no per-height formats; let yt-dlp pick the best
+                job['res_label'] = "Highest (best available)"
+            job['state'] = "idle"  # resolution known: the scheduler may queue it now
+            self.scheduler.start([job], self.get_save_path())
+        except (Exception, asyncio.CancelledError):
+            # e.g. the extraction pool was shut down: don't leave the job "analyzing" forever
+            if self._tasks.get(job_id(job)) is current and job.get('state') in ('analyzing', 'idle'):
+                self.scheduler.notify(job, state="error", status="Error")
+
+    def _cancel(self, job):
+        if job.get('state') == 'analyzing':
+            self.scheduler.notify(job, state="canceled", status="Canceled")
+        elif not self.scheduler.cancel_job(job['url']):
+            raise APIError(409, "Job is not queued or running")
+        return job_to_dict(job)
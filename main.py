@@ -2,13 +2,18 @@ import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import yt_dlp
 import threading
 import subprocess
 import platform
 from pathlib import Path
 import shutil
 import sys, os
+import multiprocessing
+from datetime import time as dtime
+from extraction import make_extractor
+from scheduler import DownloadScheduler, Profile, ProfileSchedule, load_schedule
+from ordering import POLICY_LABELS, next_seq
+from job_api import JobAPI, load_token
 
 # ======================== FFmpeg Detection (Robust) ========================
 
@@ -64,9 +69,7 @@ FFMPEG_EXE, FFPROBE_EXE, FFMPEG_LOC_FOR_YTDLP = ensure_ffmpeg_paths(USER_FFMPEG_
 
 # ======================== Globals & Utils ========================
 
-videos_list = []  # {url, title, res_label, size_bytes, status, filepath, iid}
-current_url = [None]
-cancel_event = threading.Event()
+videos_list = []  # {url, title, res_label, size_bytes, status, filepath, iid, seq, pinned}
 
 def get_default_download_folder():
     if platform.system() == "Windows":
@@ -85,20 +88,12 @@ def get_default_download_folder():
 
 default_folder = get_default_download_folder()
 
-def sizeof_fmt(num, suffix='B'):
-    if num is None:
-        return "?"
-    num = float(num)
-    for unit in ['', 'Ki', 'Mi', 'Gi', 'Ti', 'Pi', 'Ei', 'Zi']:
-        if abs(num) < 1024.0:
-            return f"{num:3.1f}{unit}{suffix}"
-        num /= 1024.0
-    return f"{num:.1f}Yi{suffix}"
-
-def speed_fmt(bytes_per_sec):
-    if not bytes_per_sec:
-        return ""
-    return f"{sizeof_fmt(float(bytes_per_sec))}/s"
+# Metadata extraction backend: "process" spreads CPU-bound extraction across
+# cores, "thread" keeps everything in this process.
+EXTRACT_BACKEND = "process"
+EXTRACT_WORKERS = min(4, os.cpu_count() or 1)
+EXTRACT_MAX_TASKS_PER_CHILD = 25  # recycle workers to cap memory growth
+extractor = make_extractor(EXTRACT_BACKEND, EXTRACT_WORKERS, EXTRACT_MAX_TASKS_PER_CHILD)
 
 def get_tag_by_status(status):
     s = (status or "").lower()
@@ -112,6 +107,9 @@ def get_tag_by_status(status):
         return "error"
     return "default"
 
+def display_name(video):
+    return ("📌 " if video.get("pinned") is not None else "") + video["title"]
+
 def update_status_in_table(url, *, status=None, resolution_with_size=None, filepath=None):
     for video in videos_list:
         if video["url"] == url:
@@ -121,11 +119,12 @@ def update_status_in_table(url, *, status=None, resolution_with_size=None, filep
                 video["res_label"] = resolution_with_size
             if filepath is not None:
                 video["filepath"] = filepath
-            tree.item(
-                video["iid"],
-                values=("🗑", video["title"], video["res_label"], video["status"]),
-                tags=(get_tag_by_status(video["status"]),)
-            )
+            if video["iid"] is not None:  # API jobs get their row via on_api_job_added
+                tree.item(
+                    video["iid"],
+                    values=("🗑", display_name(video), video["res_label"], video["status"]),
+                    tags=(get_tag_by_status(video["status"]),)
+                )
             break
 
 # ===== Friendly explanations for common download errors =====
@@ -158,51 +157,6 @@ def friendly_error_message(exc: Exception) -> str:
     return ("An unexpected error occurred. Try again, and if it persists, update yt-dlp.\n"
             "Details:\n" + e)
 
-# ======================== Size Estimation Helpers ========================
-
-def estimate_size_bytes_from_bitrate(fmt: dict, duration: float | None) -> int | None:
-    """
-    Estimate size using bitrate fields if filesize is missing.
-    yt-dlp 'tbr', 'vbr', 'abr' are in Kbits/s (usually). Use duration (s) to estimate.
-    """
-    if not duration:
-        return None
-    # Prefer 'tbr' (total bitrate); else vbr/abr depending on stream kind
-    tbr = fmt.get('tbr')  # Kbits/s
-    # If this is clearly audio-only, use abr; if video-only, use vbr when present
-    if tbr is None:
-        if fmt.get('acodec') not in (None, 'none'):
-            tbr = fmt.get('abr')
-        if tbr is None and fmt.get('vcodec') not in (None, 'none'):
-            tbr = fmt.get('vbr')
-    if not tbr:
-        return None
-    # Convert Kbits/s -> bytes: kbps * 1000 / 8 * seconds
-    try:
-        return int(float(tbr) * 1000.0 / 8.0 * float(duration))
-    except Exception:
-        return None
-
-def resolve_stream_size(fmt: dict, duration: float | None) -> int | None:
-    """Return best known or estimated size for a single format."""
-    size = fmt.get('filesize') or fmt.get('filesize_approx')
-    if size:
-        return int(size)
-    return estimate_size_bytes_from_bitrate(fmt, duration)
-
-def choose_best_audio(formats: list[dict]) -> dict | None:
-    """Pick an audio stream likely to be best for muxing (largest size or highest abr)."""
-    best = None
-    for f in formats:
-        if f.get('acodec') not in (None, 'none'):
-            # Prefer known size; fallback to abr
-            size = f.get('filesize') or f.get('filesize_approx')
-            abr = f.get('abr') or 0
-            key = (1 if size else 0, int(size or 0), float(abr))
-            if best is None or key > best[0]:
-                best = (key, f)
-    return best[1] if best else None
-
 # ======================== yt-dlp Info Fetching ========================
 
 def fetch_video_info(url):
@@ -211,58 +165,9 @@ def fetch_video_info(url):
       title (str),
       options (list of dict): [{'label': '1080p — ~245.3 MiB', 'res': '1080p', 'size_bytes': 257123456}, ...]
       Includes 'Highest (best available)' as first option with a size estimate when possible.
+    Extraction runs on the configured backend (see EXTRACT_BACKEND).
     """
-    try:
-        ydl_opts = {'quiet': True, 'noplaylist': True}
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            formats = info.get("formats", [])
-            title = info.get("title", "Unknown Title")
-            duration = info.get("duration")  # seconds (may be None)
-
-            best_audio_fmt = choose_best_audio(formats)
-
-            # collect unique heights
-            heights = sorted({f.get("height") for f in formats if f.get("height")}, key=int)
-            options = []
-
-            for h in heights:
-                # best video for this height (prefer known size; else higher tbr)
-                best_video_fmt = None
-                best_score = (-1, -1.0)  # (has_size, tbr)
-                for f in formats:
-                    if f.get("height") == h and f.get('vcodec') not in (None, 'none'):
-                        has_size = 1 if (f.get('filesize') or f.get('filesize_approx')) else 0
-                        tbr = float(f.get('tbr') or f.get('vbr') or 0.0)
-                        score = (has_size, tbr)
-                        if best_video_fmt is None or score > best_score:
-                            best_video_fmt = f
-                            best_score = score
-                if not best_video_fmt:
-                    continue
-
-                v_size = resolve_stream_size(best_video_fmt, duration) or 0
-                a_size = resolve_stream_size(best_audio_fmt, duration) if best_audio_fmt else 0
-                total_size = (v_size or 0) + (a_size or 0)
-                label = f"{h}p — {sizeof_fmt(total_size) if total_size else '?'}"
-                options.append({'label': label, 'res': f"{h}p", 'size_bytes': total_size or None})
-
-            options_sorted = sorted(options, key=lambda x: int(x['res'].replace('p', '')))
-            # Build "Highest" with estimated size from the max height option if any
-            highest_entry = None
-            if options_sorted:
-                highest_entry = {
-                    'label': f"Highest (best available) — ~{options_sorted[-1]['label'].split('~')[-1]}",
-                    'res': 'Highest',
-                    'size_bytes': options_sorted[-1]['size_bytes']
-                }
-
-            if options_sorted:
-                return title, ([highest_entry] if highest_entry else [{'label': 'Highest (best available)', 'res': 'Highest', 'size_bytes': None}]) + options_sorted
-            # If nothing matched, still return title and empty options
-            return title, []
-    except Exception:
-        return None, []
+    return extractor.fetch(url)
 
 # ======================== Busy/Waiting UI (LEFT) ========================
 
@@ -380,7 +285,9 @@ def add_video():
                     "size_bytes": selected['size_bytes'],
                     "status": status,
                     "filepath": filepath_guess if os.path.exists(filepath_guess) else None,
-                    "iid": iid
+                    "iid": iid,
+                    "seq": next_seq(),
+                    "pinned": None
                 })
                 # Clear inputs but keep the fetched title visible until next fetch
                 url_var.set("")
@@ -444,14 +351,55 @@ def delete_video(url):
             break
 
 def delete_all_videos():
-    global videos_list
     if messagebox.askyesno("Confirm", "Are you sure you want to delete all videos?"):
         for video in videos_list:
             try:
                 tree.delete(video["iid"])
             except Exception:
                 pass
-        videos_list = []
+        videos_list.clear()  # in place: the job API shares this list
+
+# ======================== Queue Ordering ========================
+
+def selected_video():
+    sel = tree.selection()
+    if not sel:
+        return None
+    for v in videos_list:
+        if v["iid"] == sel[0]:
+            return v
+    return None
+
+def move_selected(delta: int):
+    """Move the selected job up (-1) or down (+1); FIFO order and the table follow."""
+    video = selected_video()
+    if video is None:
+        return
+    i = videos_list.index(video)
+    j = i + delta
+    if not 0 <= j < len(videos_list):
+        return
+    other = videos_list[j]
+    videos_list[i], videos_list[j] = other, video
+    # Swap positions in place so a running scheduler sees the new order
+    video["seq"], other["seq"] = other["seq"], video["seq"]
+    tree.move(video["iid"], "", j)
+    tree.see(video["iid"])
+
+def toggle_pin_selected():
+    """Pinned jobs start before anything else, in the order they were pinned."""
+    video = selected_video()
+    if video is None:
+        return
+    video["pinned"] = None if video.get("pinned") is not None else next_seq()
+    update_status_in_table(video["url"])
+
+def on_order_changed(event=None):
+    label = order_var.get()
+    for policy, text in POLICY_LABELS.items():
+        if text == label:
+            scheduler.set_policy(policy)
+            break
 
 # ======================== Downloading ========================
 
@@ -463,8 +411,6 @@ def download_video():
         messagebox.showerror("Error", "Please select a save folder.")
         return
 
-    cancel_event.clear()
-
     # Friendly warning if ffmpeg is missing
     if FFMPEG_LOC_FOR_YTDLP is None:
         messagebox.showwarning(
@@ -476,274 +422,284 @@ def download_video():
         )
 
     set_busy(True, "Downloading...")
-    def task():
-        try:
-            for video in videos_list:
-                if cancel_event.is_set():
-                    break
-
-                url = video["url"]
-                title = video["title"]
-                iid = video["iid"]
-                label = video["res_label"]
-
-                if label.startswith("Highest"):
-                    fmt_str = "bestvideo+bestaudio/best"
-                    height_desc = "best"
-                else:
-                    try:
-                        height = int(label.split('p', 1)[0])
-                        height_desc = f"{height}p"
-                        fmt_str = f"bestvideo[height={height}]+bestaudio/best[height={height}]/best"
-                    except Exception:
-                        height_desc = "best"
-                        fmt_str = "bestvideo+bestaudio/best"
-
-                filename_guess = f"{title}.mp4"
-                filepath_guess = os.path.join(save_path_var.get(), filename_guess)
-                if os.path.exists(filepath_guess):
-                    update_status_in_table(url, status="Play", filepath=filepath_guess)
-                    continue
-
-                update_status_in_table(url, status=f"Starting download ({height_desc})...")
-                current_url[0] = url
-                tree.see(iid)
-
-                ydl_opts = {
-                    'format': fmt_str,
-                    'outtmpl': f'{save_path_var.get()}/%(title)s.%(ext)s',
-                    'progress_hooks': [progress_hook],
-                    'quiet': True,
-                    'no_warnings': True,
-                    'noprogress': True,            # <--- hide yt-dlp console progress
-                    'ffmpeg_location': FFMPEG_LOC_FOR_YTDLP,
-                    'noplaylist': True,
-                    'ignoreerrors': True,
-                    'http_chunk_size': 0,
-                    'socket_timeout': 15,
-                    'merge_output_format': 'mp4',
-                    'continuedl': False,
-                }
-
-                try:
-                    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                        info_dict = ydl.extract_info(url, download=True)
-                        ext = info_dict.get('ext', 'mp4')
-                        filename = os.path.join(save_path_var.get(), f"{info_dict.get('title')}.{ext}")
-                        if cancel_event.is_set():
-                            update_status_in_table(url, status="Canceled")
-                        else:
-                            update_status_in_table(url, status="Play", filepath=filename)
-                except Exception as e:
-                    update_status_in_table(url, status="Error")
-                    msg = friendly_error_message(e)
-                    root.after(0, lambda m=msg, t=title, u=url: messagebox.showerror(
-                        "Download failed",
-                        f"Video: {t}\nURL: {u}\n\n{m}"
-                    ))
-        finally:
-            set_busy(False)
-            current_url[0] = None
-    threading.Thread(target=task, daemon=True).start()
+    scheduler.start(list(videos_list), save_path_var.get())
 
 def cancel_downloading():
-    cancel_event.set()
-
-def progress_hook(d):
-    url = current_url[0]
-    if cancel_event.is_set():
-        raise Exception("Canceled by user")
-    if not url:
-        return
-
-    if d.get('status') == 'downloading':
-        # Numeric values (more consistent than _*_str fields)
-        downloaded = float(d.get('downloaded_bytes') or 0)
-        total = float(d.get('total_bytes') or d.get('total_bytes_estimate') or 0)
-        speed = d.get('speed')  # bytes/sec or None
-
-        # Percent
-        if total > 0:
-            pct = downloaded / total * 100.0
-            percent_str = f"{pct:.1f}%"
-            total_str = sizeof_fmt(total)
-        else:
-            percent_str = (d.get('_percent_str') or '0.0%').strip()
-            total_str = "?"
+    scheduler.cancel()
+
+def on_download_error(job, exc):
+    msg = friendly_error_message(exc)
+    root.after(0, lambda m=msg, t=job["title"], u=job["url"]: messagebox.showerror(
+        "Download failed",
+        f"Video: {t}\nURL: {u}\n\n{m}"
+    ))
+
+def on_download_progress(text):
+    root.after(0, lambda: busy_msg_var.set(text))
+
+def on_profile_changed(profile):
+    root.after(0, lambda: profile_var.set(f"Profile: {profile.describe()}"))
+
+# Bandwidth/concurrency profiles. Override with a profiles.json next to the app
+# (see scheduler.load_schedule for the format).
+DEFAULT_SCHEDULE = ProfileSchedule(
+    [Profile("Office hours", max_jobs=2, rate_limit=5 * 1024 * 1024, start=dtime(8, 0), end=dtime(18, 0))],
+    default=Profile("Off hours", max_jobs=8, rate_limit=None),
+)
+# Next to the .exe when frozen (resource_path() would point into the onefile temp dir)
+APP_DIR = os.path.dirname(sys.executable if getattr(sys, 'frozen', False) else os.path.abspath(__file__))
+PROFILES_FILE = os.path.join(APP_DIR, "profiles.json")
 
-        # Sizes
-        downloaded_str = sizeof_fmt(downloaded)
-
-        # Speed (no padding)
-        speed_str = speed_fmt(speed) if speed else "--/s"
-
-        # Final: 98.9% (127.5MiB/128.9MiB)  --  5.16MiB/s
-        status_text = f"{percent_str} ({downloaded_str}/{total_str})  --  {speed_str}"
-
-        # Update table + status line + console
-        update_status_in_table(url, status=status_text)
-        busy_msg_var.set(status_text)
-
-    elif d.get('status') == 'finished':
-        update_status_in_table(url, status="Processing...")
-        busy_msg_var.set("Processing...")
+try:
+    download_schedule = load_schedule(PROFILES_FILE, DEFAULT_SCHEDULE)
+    profiles_error = None
+except (ValueError, OSError) as e:
+    download_schedule = DEFAULT_SCHEDULE
+    profiles_error = str(e)
+
+# Which queued job starts next: "fifo", "sjf", "largest" or "aging" (see ordering.py)
+QUEUE_ORDER = "fifo"
+
+scheduler = DownloadScheduler(
+    download_schedule,
+    policy=QUEUE_ORDER,
+    ffmpeg_location=FFMPEG_LOC_FOR_YTDLP,
+    on_update=lambda url, **kw: root.after(0, lambda: update_status_in_table(url, **kw)),
+    on_progress=on_download_progress,
+    on_error=on_download_error,
+    on_profile=on_profile_changed,
+    on_finished=lambda: set_busy(False),
+)
+
+# Local HTTP/JSON job API (see job_api.py); None to disable
+JOB_API_PORT = 8765
+# Clients send this file's contents in the X-Job-Token header; created on first run
+JOB_API_TOKEN_FILE = os.path.join(APP_DIR, "api_token.txt")
+
+def on_api_job_added(job):
+    """Give a job submitted over the API its row in the table."""
+    def _insert():
+        if not any(v is job for v in videos_list):
+            return  # cleared before we got here
+        job["iid"] = tree.insert("", tk.END, values=("🗑", display_name(job), job["res_label"], job["status"]),
+                                 tags=(get_tag_by_status(job["status"]),))
+    root.after(0, _insert)
+
+def refresh_profile():
+    """Keep the status area (and the limiter) on the current profile while idle."""
+    scheduler.apply_profile()
+    root.after(30_000, refresh_profile)
 
 # ======================== GUI ========================
 
-root = tb.Window(themename="superhero")
-root.title("YouTube Video Downloader")
-root.geometry("960x740")
-root.minsize(900, 700)
-root.resizable(True, True)
+if __name__ == "__main__":
+    # Extraction worker processes re-import this module; only the real entry
+    # point may build the window. freeze_support() is needed for frozen builds.
+    multiprocessing.freeze_support()
+
+    root = tb.Window(themename="superhero")
+    root.title("YouTube Video Downloader")
+    root.geometry("960x740")
+    root.minsize(900, 700)
+    root.resizable(True, True)
 
-try:
-    root.iconbitmap(resource_path("logo.ico"))
-except Exception:
-    # fallback: png/jpg كصورة نافذة لبعض البيئات (ليس أيقونة شريط المهام)
     try:
-        import PIL.Image, PIL.ImageTk
-        from PIL import ImageTk, Image
-        img = Image.open(resource_path("logo.jpg"))
-        tkicon = ImageTk.PhotoImage(img)
-        root.iconphoto(True, tkicon)
+        root.iconbitmap(resource_path("logo.ico"))
     except Exception:
-        pass
-    
-# Title
-title_lbl = tb.Label(root, text="Welcome to YouTube Downloader", font=("Arial", 20, "bold"), foreground="white")
-title_lbl.pack(pady=15)
-
-# URL + Fetch
-frame_url = tb.Frame(root)
-frame_url.pack(fill="x", padx=20, pady=5)
-
-url_var = tk.StringVar()
-tb.Label(frame_url, text="Video URL:", font=("Arial", 12), foreground="white").pack(side=tk.LEFT)
-url_entry = tb.Entry(frame_url, textvariable=url_var, width=64)
-url_entry.pack(side=tk.LEFT, padx=10)
-fetch_btn = tb.Button(frame_url, text="Fetch Resolutions", bootstyle=INFO, command=threaded_fetch_resolutions)
-fetch_btn.pack(side=tk.LEFT)
-
-# Title (from fetched info)
-frame_title = tb.Frame(root)
-frame_title.pack(fill="x", padx=20, pady=(0, 5))
-title_var = tk.StringVar(value="Title: —")
-tb.Label(frame_title, textvariable=title_var, font=("Arial", 11), foreground="white").pack(side=tk.LEFT)
-
-# Resolution + Add
-frame_res = tb.Frame(root)
-frame_res.pack(fill="x", padx=20, pady=5)
-
-tb.Label(frame_res, text="Select Resolution (with size):", font=("Arial", 12), foreground="white").pack(side=tk.LEFT)
-resolution_var = tk.StringVar()
-resolution_combo = tb.Combobox(frame_res, textvariable=resolution_var, state="readonly", width=40)
-resolution_combo.pack(side=tk.LEFT, padx=10)
-resolution_combo.set("")
-
-add_btn = tb.Button(frame_res, text="Add Video", bootstyle=SUCCESS, command=add_video)
-add_btn.pack(side=tk.LEFT, padx=5)
-
-# Results Tree
-frame_results = tb.Frame(root)
-frame_results.pack(fill="both", expand=True, padx=20, pady=10)
-
-columns = ("Delete", "Name", "Resolution", "Status")
-tree = tb.Treeview(frame_results, columns=columns, show="headings", selectmode="browse")
-tree.pack(side=tk.LEFT, fill="both", expand=True)
-
-scrollbar = tb.Scrollbar(frame_results, orient=tk.VERTICAL, command=tree.yview)
-scrollbar.pack(side=tk.LEFT, fill="y")
-tree.configure(yscrollcommand=scrollbar.set)
-
-tree.heading("Delete", text="")
-tree.heading("Name", text="Name", anchor="w")
-tree.heading("Resolution", text="Resolution (with size)")
-tree.heading("Status", text="Status")
-
-tree.column("Delete", anchor=tk.CENTER, width=36)
-tree.column("Name", anchor="w", width=420) 
-tree.column("Resolution", anchor=tk.CENTER, width=220)
-tree.column("Status", anchor=tk.CENTER, width=220)
-
-tree.tag_configure("default", foreground="white", font=("Arial", 10, "bold"))
-tree.tag_configure("done", foreground="#28a745", font=("Arial", 10, "bold"))
-tree.tag_configure("play", foreground="#007bff", font=("Arial", 10, "bold"))
-tree.tag_configure("orange", foreground="#fd7e14", font=("Arial", 10, "bold"))
-tree.tag_configure("ready", foreground="#007bff", font=("Arial", 10, "bold"))
-tree.tag_configure("error", foreground="#dc3545", font=("Arial", 10, "bold"))
-
-tree.bind("<Double-1>", on_tree_double_click)
-tree.bind("<Button-1>", on_tree_click)
-
-# Clear All row
-frame_controls = tb.Frame(root)
-frame_controls.pack(fill="x", padx=20, pady=(0, 10))
-clear_all_btn = tb.Button(frame_controls, text="Clear All", bootstyle=DANGER, command=delete_all_videos)
-clear_all_btn.pack(side=tk.RIGHT)
-
-# Save folder row
-frame_bottom = tb.Frame(root)
-frame_bottom.pack(fill="x", padx=20, pady=5)
-
-save_path_var = tk.StringVar(value=default_folder)
-tb.Label(frame_bottom, text="Save Folder:", font=("Arial", 12), foreground="white").pack(side=tk.LEFT)
-save_entry = tb.Entry(frame_bottom, textvariable=save_path_var, width=50)
-save_entry.pack(side=tk.LEFT, padx=10)
-browse_btn = tb.Button(frame_bottom, text="Browse", bootstyle=SECONDARY, command=browse_folder)
-browse_btn.pack(side=tk.LEFT, padx=5)
-
-# Actions row (aligned RIGHT)
-frame_actions = tb.Frame(root)
-frame_actions.pack(fill="x", padx=20, pady=10)
-
-# LEFT: status area (spinner + text)
-status_left = tb.Frame(frame_actions)
-status_left.pack(side=tk.LEFT, fill="x", expand=True)
-
-busy_msg_var = tk.StringVar(value="Waiting...")
-busy_bar = tb.Progressbar(status_left, mode="indeterminate", length=160, bootstyle=INFO)
-busy_lbl = tb.Label(status_left, textvariable=busy_msg_var, font=("Arial", 10, "italic"), foreground="white")
-# Initially hidden; set_busy() handles packing/unpacking
-
-# RIGHT: action buttons
-actions_right = tb.Frame(frame_actions)
-actions_right.pack(side=tk.RIGHT)
-
-download_btn = tb.Button(actions_right, text="Download All", bootstyle=PRIMARY, command=download_video)
-download_btn.pack(side=tk.LEFT, padx=5)
-
-cancel_btn = tb.Button(actions_right, text="Cancel Current", bootstyle=WARNING, command=cancel_downloading)
-cancel_btn.pack(side=tk.LEFT, padx=5)
-
-def open_folder():
-    path = save_path_var.get()
-    if not path or not os.path.exists(path):
-        messagebox.showerror("Error", "Save folder does not exist.")
-        return
-    if platform.system() == "Windows":
-        os.startfile(path)
-    elif platform.system() == "Darwin":
-        subprocess.call(["open", path])
-    else:
-        subprocess.call(["xdg-open", path])
-
-open_folder_btn = tb.Button(actions_right, text="Open Folder", bootstyle=INFO, command=open_folder)
-open_folder_btn.pack(side=tk.LEFT, padx=5)
-
-console_frame = tb.Frame(root)
-console_frame.pack(fill="both", padx=20, pady=(0, 10))
+        # fallback: png/jpg كصورة نافذة لبعض البيئات (ليس أيقونة شريط المهام)
+        try:
+            import PIL.Image, PIL.ImageTk
+            from PIL import ImageTk, Image
+            img = Image.open(resource_path("logo.jpg"))
+            tkicon = ImageTk.PhotoImage(img)
+            root.iconphoto(True, tkicon)
+        except Exception:
+            pass
+
+    # Title
+    title_lbl = tb.Label(root, text="Welcome to YouTube Downloader", font=("Arial", 20, "bold"), foreground="white")
+    title_lbl.pack(pady=15)
+
+    # URL + Fetch
+    frame_url = tb.Frame(root)
+    frame_url.pack(fill="x", padx=20, pady=5)
+
+    url_var = tk.StringVar()
+    tb.Label(frame_url, text="Video URL:", font=("Arial", 12), foreground="white").pack(side=tk.LEFT)
+    url_entry = tb.Entry(frame_url, textvariable=url_var, width=64)
+    url_entry.pack(side=tk.LEFT, padx=10)
+    fetch_btn = tb.Button(frame_url, text="Fetch Resolutions", bootstyle=INFO, command=threaded_fetch_resolutions)
+    fetch_btn.pack(side=tk.LEFT)
+
+    # Title (from fetched info)
+    frame_title = tb.Frame(root)
+    frame_title.pack(fill="x", padx=20, pady=(0, 5))
+    title_var = tk.StringVar(value="Title: —")
+    tb.Label(frame_title, textvariable=title_var, font=("Arial", 11), foreground="white").pack(side=tk.LEFT)
+
+    # Resolution + Add
+    frame_res = tb.Frame(root)
+    frame_res.pack(fill="x", padx=20, pady=5)
+
+    tb.Label(frame_res, text="Select Resolution (with size):", font=("Arial", 12), foreground="white").pack(side=tk.LEFT)
+    resolution_var = tk.StringVar()
+    resolution_combo = tb.Combobox(frame_res, textvariable=resolution_var, state="readonly", width=40)
+    resolution_combo.pack(side=tk.LEFT, padx=10)
+    resolution_combo.set("")
 
-# Status bar (LEFT-aligned busy indicator)
-status_bar = tb.Frame(root)
-status_bar.pack(fill="x", padx=20, pady=(0, 8), side=tk.BOTTOM, anchor="w")
-busy_msg_var = tk.StringVar(value="")
-busy_bar = tb.Progressbar(status_bar, mode="indeterminate", length=160, bootstyle=INFO)
-busy_lbl = tb.Label(status_bar, textvariable=busy_msg_var, font=("Arial", 10, "italic"), foreground="white")
-# initially hidden
-# (widgets are packed dynamically in set_busy)
+    add_btn = tb.Button(frame_res, text="Add Video", bootstyle=SUCCESS, command=add_video)
+    add_btn.pack(side=tk.LEFT, padx=5)
+
+    # Results Tree
+    frame_results = tb.Frame(root)
+    frame_results.pack(fill="both", expand=True, padx=20, pady=10)
+
+    columns = ("Delete", "Name", "Resolution", "Status")
+    tree = tb.Treeview(frame_results, columns=columns, show="headings", selectmode="browse")
+    tree.pack(side=tk.LEFT, fill="both", expand=True)
+
+    scrollbar = tb.Scrollbar(frame_results, orient=tk.VERTICAL, command=tree.yview)
+    scrollbar.pack(side=tk.LEFT, fill="y")
+    tree.configure(yscrollcommand=scrollbar.set)
+
+    tree.heading("Delete", text="")
+    tree.heading("Name", text="Name", anchor="w")
+    tree.heading("Resolution", text="Resolution (with size)")
+    tree.heading("Status", text="Status")
+
+    tree.column("Delete", anchor=tk.CENTER, width=36)
+    tree.column("Name", anchor="w", width=420) 
+    tree.column("Resolution", anchor=tk.CENTER, width=220)
+    tree.column("Status", anchor=tk.CENTER, width=220)
+
+    tree.tag_configure("default", foreground="white", font=("Arial", 10, "bold"))
+    tree.tag_configure("done", foreground="#28a745", font=("Arial", 10, "bold"))
+    tree.tag_configure("play", foreground="#007bff", font=("Arial", 10, "bold"))
+    tree.tag_configure("orange", foreground="#fd7e14", font=("Arial", 10, "bold"))
+    tree.tag_configure("ready", foreground="#007bff", font=("Arial", 10, "bold"))
+    tree.tag_configure("error", foreground="#dc3545", font=("Arial", 10, "bold"))
+
+    tree.bind("<Double-1>", on_tree_double_click)
+    tree.bind("<Button-1>", on_tree_click)
+
+    # Clear All row
+    frame_controls = tb.Frame(root)
+    frame_controls.pack(fill="x", padx=20, pady=(0, 10))
+    clear_all_btn = tb.Button(frame_controls, text="Clear All", bootstyle=DANGER, command=delete_all_videos)
+
+    # Queue ordering (stays enabled while downloading so jobs can be reordered live)
+    tb.Label(frame_controls, text="Order:", font=("Arial", 11), foreground="white").pack(side=tk.LEFT)
+    order_var = tk.StringVar(value=POLICY_LABELS[QUEUE_ORDER])
+    order_combo = tb.Combobox(frame_controls, textvariable=order_var, state="readonly", width=24,
+                              values=list(POLICY_LABELS.values()))
+    order_combo.pack(side=tk.LEFT, padx=(8, 10))
+    order_combo.bind("<<ComboboxSelected>>", on_order_changed)
+    move_up_btn = tb.Button(frame_controls, text="▲ Up", bootstyle=SECONDARY, command=lambda: move_selected(-1))
+    move_up_btn.pack(side=tk.LEFT, padx=2)
+    move_down_btn = tb.Button(frame_controls, text="▼ Down", bootstyle=SECONDARY, command=lambda: move_selected(1))
+    move_down_btn.pack(side=tk.LEFT, padx=2)
+    pin_btn = tb.Button(frame_controls, text="📌 Pin / Unpin", bootstyle=SECONDARY, command=toggle_pin_selected)
+    pin_btn.pack(side=tk.LEFT, padx=2)
+    clear_all_btn.pack(side=tk.RIGHT)
+
+    # Save folder row
+    frame_bottom = tb.Frame(root)
+    frame_bottom.pack(fill="x", padx=20, pady=5)
+
+    save_path_var = tk.StringVar(value=default_folder)
+    tb.Label(frame_bottom, text="Save Folder:", font=("Arial", 12), foreground="white").pack(side=tk.LEFT)
+    save_entry = tb.Entry(frame_bottom, textvariable=save_path_var, width=50)
+    save_entry.pack(side=tk.LEFT, padx=10)
+    browse_btn = tb.Button(frame_bottom, text="Browse", bootstyle=SECONDARY, command=browse_folder)
+    browse_btn.pack(side=tk.LEFT, padx=5)
+
+    # Actions row (aligned RIGHT)
+    frame_actions = tb.Frame(root)
+    frame_actions.pack(fill="x", padx=20, pady=10)
+
+    # LEFT: status area (spinner + text)
+    status_left = tb.Frame(frame_actions)
+    status_left.pack(side=tk.LEFT, fill="x", expand=True)
+
+    busy_msg_var = tk.StringVar(value="Waiting...")
+    busy_bar = tb.Progressbar(status_left, mode="indeterminate", length=160, bootstyle=INFO)
+    busy_lbl = tb.Label(status_left, textvariable=busy_msg_var, font=("Arial", 10, "italic"), foreground="white")
+    # Initially hidden; set_busy() handles packing/unpacking
+
+    # RIGHT: action buttons
+    actions_right = tb.Frame(frame_actions)
+    actions_right.pack(side=tk.RIGHT)
+
+    download_btn = tb.Button(actions_right, text="Download All", bootstyle=PRIMARY, command=download_video)
+    download_btn.pack(side=tk.LEFT, padx=5)
+
+    cancel_btn = tb.Button(actions_right, text="Cancel Current", bootstyle=WARNING, command=cancel_downloading)
+    cancel_btn.pack(side=tk.LEFT, padx=5)
+
+    def open_folder():
+        path = save_path_var.get()
+        if not path or not os.path.exists(path):
+            messagebox.showerror("Error", "Save folder does not exist.")
+            return
+        if platform.system() == "Windows":
+            os.startfile(path)
+        elif platform.system() == "Darwin":
+            subprocess.call(["open", path])
+        else:
+            subprocess.call(["xdg-open", path])
+
+    open_folder_btn = tb.Button(actions_right, text="Open Folder", bootstyle=INFO, command=open_folder)
+    open_folder_btn.pack(side=tk.LEFT, padx=5)
+
+    console_frame = tb.Frame(root)
+    console_frame.pack(fill="both", padx=20, pady=(0, 10))
+
+    # Status bar (LEFT-aligned busy indicator)
+    status_bar = tb.Frame(root)
+    status_bar.pack(fill="x", padx=20, pady=(0, 8), side=tk.BOTTOM, anchor="w")
+    busy_msg_var = tk.StringVar(value="")
+    busy_bar = tb.Progressbar(status_bar, mode="indeterminate", length=160, bootstyle=INFO)
+    busy_lbl = tb.Label(status_bar, textvariable=busy_msg_var, font=("Arial", 10, "italic"), foreground="white")
+    # initially hidden
+    # (widgets are packed dynamically in set_busy)
+
+    # Active bandwidth/concurrency profile (always visible, RIGHT)
+    profile_var = tk.StringVar(value="")
+    profile_lbl = tb.Label(status_bar, textvariable=profile_var, font=("Arial", 10, "italic"), foreground="gray")
+    profile_lbl.pack(side=tk.RIGHT)
+    refresh_profile()
+    if profiles_error:
+        root.after(0, lambda: messagebox.showwarning(
+            "Invalid profiles.json",
+            f"Could not load {PROFILES_FILE}:\n{profiles_error}\n\nUsing the default profiles instead."
+        ))
+
+    # The API thread must not touch Tk: give it a plain copy of the save folder, kept current by a trace
+    api_save_path = save_path_var.get()
+
+    def remember_save_path(*_):
+        global api_save_path
+        api_save_path = save_path_var.get()
+
+    save_path_var.trace_add("write", remember_save_path)
+
+    job_api = None
+    if JOB_API_PORT:
+        try:
+            job_api = JobAPI(scheduler, extractor, videos_list, lambda: api_save_path,
+                             token=load_token(JOB_API_TOKEN_FILE), port=JOB_API_PORT,
+                             on_job_added=on_api_job_added)
+            job_api.start()
+        except OSError:
+            job_api = None  # port taken (e.g. a second instance) or token unwritable: run without the API
 
-# Footer
-footer_lbl = tb.Label(root, text="Created by Zaidon", font=("Arial", 10, "italic"), foreground="gray")
-footer_lbl.pack(side=tk.BOTTOM, pady=5)
+    # Footer
+    footer_lbl = tb.Label(root, text="Created by Zaidon", font=("Arial", 10, "italic"), foreground="gray")
+    footer_lbl.pack(side=tk.BOTTOM, pady=5)
 
-root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        if job_api is not None:
+            job_api.stop()
+        extractor.shutdown(wait=False)
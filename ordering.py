@@ -0,0 +1,76 @@
+import itertools
+import time
+
+# ======================== Queue Ordering Policies ========================
+#
+# A policy is a key function key(job, now) -> sortable; the job with the
+# smallest key runs next. Jobs are the usual dicts; the fields used here are
+#   size_bytes  estimated download size (None if unknown)
+#   seq         position in the user's list (lower = earlier), see next_seq()
+#   queued_at   time.monotonic() when the job was queued
+#   pinned      None, or a next_seq() value; pinned jobs always run first
+
+# Waiting time credited to a job under "aging": every second in the queue
+# counts as this many bytes less work, so a 20 GiB job outranks fresh
+# 30 MiB clips after roughly 20 GiB / 8 MiB/s ~= 43 minutes.
+AGING_BYTES_PER_SEC = 8 * 1024 * 1024
+
+# Size assumed for jobs with no estimate under "aging". It has to be finite,
+# or waiting could never promote them; at the default rate an unknown job
+# overtakes fresh clips after about 4 GiB / 8 MiB/s ~= 8.5 minutes.
+AGING_UNKNOWN_SIZE = 4 * 1024 ** 3
+
+_seq = itertools.count()
+
+def next_seq() -> int:
+    """Monotonic counter for job positions and pin order."""
+    return next(_seq)
+
+def _size(job, unknown):
+    size = job.get('size_bytes')
+    return unknown if size is None else size
+
+def fifo_key(job, now):
+    return (job.get('seq', 0),)
+
+def shortest_first_key(job, now):
+    # Unknown sizes go last: they could be anything
+    return (_size(job, float('inf')), job.get('seq', 0))
+
+def largest_first_key(job, now):
+    return (-_size(job, -1), job.get('seq', 0))
+
+def make_aging_key(bytes_per_sec: float = AGING_BYTES_PER_SEC, unknown_size: int = AGING_UNKNOWN_SIZE):
+    """Shortest-first, minus a credit that grows with time spent waiting."""
+    def aging_key(job, now):
+        waited = max(0.0, now - job.get('queued_at', now))
+        return (_size(job, unknown_size) - bytes_per_sec * waited, job.get('seq', 0))
+    return aging_key
+
+POLICIES = {
+    "fifo": fifo_key,
+    "sjf": shortest_first_key,
+    "largest": largest_first_key,
+    "aging": make_aging_key(),
+}
+
+POLICY_LABELS = {
+    "fifo": "Insertion order (FIFO)",
+    "sjf": "Shortest first",
+    "largest": "Largest first",
+    "aging": "Shortest first + aging",
+}
+
+def pick_next(queue: list[dict], policy: str = "fifo", now: float | None = None) -> int:
+    """Index of the job in `queue` that should start next. Pinned jobs win, in pin order."""
+    key = POLICIES[policy]
+    now = time.monotonic() if now is None else now
+
+    def full_key(i):
+        job = queue[i]
+        pin = job.get('pinned')
+        if pin is not None:
+            return (0, (pin,))
+        return (1, key(job, now))
+
+    return min(range(len(queue)), key=full_key)
@@ -0,0 +1,434 @@
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, time as dtime
+
+import yt_dlp
+
+from extraction import sizeof_fmt
+from ordering import POLICIES, next_seq, pick_next
+
+# ======================== Bandwidth / Concurrency Profiles ========================
+
+@dataclass(frozen=True)
+class Profile:
+    """How hard to run the queue: parallel jobs and total bandwidth (bytes/s, None = unlimited)."""
+    name: str
+    max_jobs: int = 1
+    rate_limit: int | None = None
+    start: dtime | None = None  # active window [start, end); may wrap past midnight
+    end: dtime | None = None
+
+    def covers(self, now: datetime) -> bool:
+        if self.start is None or self.end is None:
+            return True
+        t = now.time()
+        if self.start <= self.end:
+            return self.start <= t < self.end
+        return t >= self.start or t < self.end
+
+    def describe(self) -> str:
+        rate = f"{sizeof_fmt(self.rate_limit)}/s" if self.rate_limit else "unlimited"
+        jobs = f"{self.max_jobs} job" + ("" if self.max_jobs == 1 else "s")
+        return f"{self.name} ({jobs}, {rate})"
+
+
+class ProfileSchedule:
+    """Picks the first windowed profile covering the current time, else the default."""
+
+    def __init__(self, profiles: list[Profile], default: Profile):
+        self.profiles = list(profiles)
+        self.default = default
+
+    def active(self, now: datetime | None = None) -> Profile:
+        now = now or datetime.now()
+        for p in self.profiles:
+            if p.covers(now):
+                return p
+        return self.default
+
+
+_RATE_UNITS = {'': 1, 'k': 1000, 'm': 1000 ** 2, 'g': 1000 ** 3,
+               'ki': 1024, 'mi': 1024 ** 2, 'gi': 1024 ** 3}
+
+def parse_rate(value) -> int | None:
+    """'5MiB', '800K', 1048576 -> bytes/s. None/''/'unlimited' -> None; rates <= 0 raise ValueError."""
+    if value is None or str(value).strip().lower() in ('', 'unlimited'):
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        rate = int(value)
+    else:
+        m = re.fullmatch(r"\s*(\d+(?:\.\d*)?|\.\d+)\s*([kmg]i?)?b?(?:/s)?\s*", str(value).lower())
+        if not m:
+            raise ValueError(f"Invalid rate: {value!r}")
+        rate = int(float(m.group(1)) * _RATE_UNITS[m.group(2) or ''])
+    if rate <= 0:
+        raise ValueError(f"Rate must be positive: {value!r}")
+    return rate
+
+def parse_window(value: str) -> tuple[dtime, dtime]:
+    """'08:00-18:00' (or '8:00-18:00') -> (time(8), time(18))."""
+    start, end = (s.strip() for s in value.split('-', 1))
+    return (datetime.strptime(start, "%H:%M").time(),
+            datetime.strptime(end, "%H:%M").time())
+
+def profile_from_dict(d: dict) -> Profile:
+    start = end = None
+    if d.get('window'):
+        start, end = parse_window(d['window'])
+    return Profile(
+        name=d.get('name', d.get('window', 'Default')),
+        max_jobs=max(1, int(d.get('jobs', 1))),
+        rate_limit=parse_rate(d.get('rate')),
+        start=start,
+        end=end,
+    )
+
+def load_schedule(path: str, fallback: ProfileSchedule) -> ProfileSchedule:
+    """
+    Load profiles from a JSON file, e.g.:
+      {"default": {"name": "Off hours", "jobs": 8},
+       "profiles": [{"name": "Office hours", "window": "08:00-18:00", "jobs": 2, "rate": "5MiB"}]}
+    Returns `fallback` if the file is missing. Raises OSError if it can't be
+    read and ValueError if it is malformed.
+    """
+    if not os.path.isfile(path):
+        return fallback
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)  # JSONDecodeError is a ValueError
+    try:
+        default = profile_from_dict(data['default']) if 'default' in data else fallback.default
+        return ProfileSchedule([profile_from_dict(p) for p in data.get('profiles', [])], default)
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid profile entry: {e!r}") from e
+
+# ======================== Shared Rate Limiter ========================
+
+class RateLimiter:
+    """
+    Token bucket shared by all running downloads. Progress hooks call
+    consume() with the bytes just received and sleep until the total stays
+    under the rate. set_rate() takes effect immediately, even mid-sleep.
+    """
+
+    def __init__(self, rate: int | None = None):
+        self.rate = rate
+        self._cond = threading.Condition()
+        self._next_free = time.monotonic()
+
+    def set_rate(self, rate: int | None):
+        with self._cond:
+            self.rate = rate
+            self._next_free = time.monotonic()
+            self._cond.notify_all()
+
+    def wake(self):
+        """Wake every throttled caller so it re-checks its cancel event."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def consume(self, nbytes: int, cancel_event: threading.Event | None = None):
+        with self._cond:
+            while True:
+                rate = self.rate
+                if not rate or nbytes <= 0:
+                    return
+                now = time.monotonic()
+                start = max(self._next_free, now)
+                delay = start - now
+                if delay <= 0:
+                    self._next_free = start + nbytes / rate
+                    return
+                # Wait for our slot; a rate change wakes us up to recompute
+                self._cond.wait(min(delay, 1.0))
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+
+# ======================== Download Scheduler ========================
+
+def format_for_label(label: str) -> tuple[str, str]:
+    """Map a resolution label to (yt-dlp format string, human description)."""
+    if label.startswith("Highest"):
+        return "bestvideo+bestaudio/best", "best"
+    try:
+        height = int(label.split('p', 1)[0])
+        return f"bestvideo[height={height}]+bestaudio/best[height={height}]/best", f"{height}p"
+    except Exception:
+        return "bestvideo+bestaudio/best", "best"
+
+
+class DownloadScheduler:
+    """
+    Runs queued jobs ({url, title, res_label, ...} dicts) on worker threads.
+
+    The active profile is re-evaluated every `tick` seconds: a higher job
+    limit starts more downloads right away, a lower one just stops starting
+    new ones, and bandwidth changes apply to in-flight downloads through the
+    shared RateLimiter. Nothing is restarted.
+
+    Which queued job starts next is decided by `policy` (see ordering.py),
+    evaluated each time a slot frees up, so reordering or pinning jobs
+    (mutating their 'seq' / 'pinned' fields) takes effect immediately.
+
+    The scheduler keeps 'status', 'state' (queued / running / done / error /
+    canceled / idle), 'filepath' and 'progress' up to date on each job dict.
+
+    Callbacks (all optional, called from worker threads):
+      on_update(url, status=None, filepath=None)
+      on_progress(text)        aggregate status line
+      on_error(job, exc)
+      on_profile(profile)      active profile changed
+      on_finished()            queue drained or canceled
+    Extra observers can be appended to `listeners`; each is called as
+    listener(job) after every change to a job.
+    """
+
+    def __init__(self, schedule: ProfileSchedule, *, policy: str = "fifo", ffmpeg_location=None, tick: float = 1.0,
+                 on_update=None, on_progress=None, on_error=None, on_profile=None, on_finished=None):
+        self.schedule = schedule
+        self.policy = policy
+        self.ffmpeg_location = ffmpeg_location
+        self.tick = tick
+        self.on_update = on_update or (lambda url, **kw: None)
+        self.on_progress = on_progress or (lambda text: None)
+        self.on_error = on_error or (lambda job, exc: None)
+        self.on_profile = on_profile or (lambda profile: None)
+        self.on_finished = on_finished or (lambda: None)
+        self.listeners = []
+
+        self.limiter = RateLimiter()
+        self.profile = None
+        self.save_path = None
+        self._cond = threading.Condition()
+        self._queue = []      # jobs waiting for a slot
+        self._active = {}     # url -> job
+        self._stops = {}      # url -> Event, set to cancel that running job
+        self._speeds = {}     # url -> last reported bytes/s
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def counts(self) -> tuple[int, int]:
+        """(active, queued) job counts."""
+        with self._cond:
+            return len(self._active), len(self._queue)
+
+    def start(self, jobs: list[dict], save_path: str):
+        """
+        Queue jobs and start the loop if idle. Skips jobs already queued or
+        running, and API jobs still being analyzed (their resolution isn't
+        known yet; the API queues them itself once it is).
+        """
+        with self._cond:
+            self.save_path = save_path
+            busy = {j['url'] for j in self._queue} | set(self._active)
+            now = time.monotonic()
+            for job in jobs:
+                if job['url'] not in busy and job.get('state') != "analyzing":
+                    job.setdefault('seq', next_seq())
+                    job['queued_at'] = now
+                    self._queue.append(job)
+                    self.notify(job, state="queued", status="Waiting...")
+            if not self.running:
+                self._thread = threading.Thread(target=self._loop, daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def set_policy(self, policy: str):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown ordering policy: {policy!r}")
+        self.policy = policy
+
+    def cancel(self):
+        """
+        Stop what is queued or running right now: running downloads are
+        aborted, queued ones go back to Ready. Jobs queued afterwards, even
+        while the aborted ones are still winding down, run normally.
+        """
+        with self._cond:
+            queued, self._queue = self._queue, []
+            for job in queued:
+                self.notify(job, state="idle", status="Ready")
+            for stop in self._stops.values():
+                stop.set()
+            self._cond.notify_all()
+        self.limiter.wake()
+
+    def cancel_job(self, url: str) -> bool:
+        """Cancel one queued or running job. Returns False if it is neither."""
+        with self._cond:
+            for i, job in enumerate(self._queue):
+                if job['url'] == url:
+                    del self._queue[i]
+                    self.notify(job, state="canceled", status="Canceled")
+                    self._cond.notify_all()
+                    return True
+            stop = self._stops.get(url)
+            job = self._active.get(url)
+            if stop is None or job is None or job.get('state') in ("done", "error", "canceled"):
+                return False  # not running, or already finished and just winding down
+            stop.set()
+        self.limiter.wake()
+        return True
+
+    def apply_profile(self) -> Profile:
+        profile = self.schedule.active()
+        if profile != self.profile:
+            self.profile = profile
+            self.limiter.set_rate(profile.rate_limit)
+            self.on_profile(profile)
+        return profile
+
+    def notify(self, job, *, state=None, **fields):
+        """Record a change on `job` and tell on_update and every listener about it."""
+        if state is not None:
+            job['state'] = state
+        for key, value in fields.items():
+            if value is not None:
+                job[key] = value
+        self.on_update(job['url'], **fields)
+        for listener in list(self.listeners):
+            try:
+                listener(job)
+            except Exception:
+                pass
+
+    def _loop(self):
+        try:
+            while True:
+                profile = self.apply_profile()
+                with self._cond:
+                    if not self._queue and not self._active:
+                        self._thread = None
+                        break
+                    while self._queue and len(self._active) < profile.max_jobs:
+                        job = self._queue.pop(pick_next(self._queue, self.policy))
+                        self._active[job['url']] = job
+                        self._stops[job['url']] = threading.Event()
+                        threading.Thread(target=self._worker, args=(job,), daemon=True).start()
+                    self._report()
+                    self._cond.wait(timeout=self.tick)
+        finally:
+            # Even if the loop died, let the next start() spin up a fresh one
+            with self._cond:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+            self.on_finished()
+
+    def _worker(self, job):
+        try:
+            self._run_job(job, self._stops[job['url']])
+        finally:
+            with self._cond:
+                self._active.pop(job['url'], None)
+                self._stops.pop(job['url'], None)
+                self._speeds.pop(job['url'], None)
+                self._cond.notify_all()
+
+    def _report(self):
+        speed = sum(s for s in self._speeds.values() if s)
+        text = f"Downloading: {len(self._active)} active, {len(self._queue)} queued"
+        if speed:
+            text += f"  --  {sizeof_fmt(speed)}/s"
+        self.on_progress(text)
+
+    def _run_job(self, job, stop):
+        url = job["url"]
+        save_path = self.save_path
+        audio_only = bool(job.get("audio_only"))
+        if audio_only:
+            fmt_str, height_desc, final_ext = "bestaudio/best", "audio", "mp3"
+        else:
+            fmt_str, height_desc = format_for_label(job["res_label"])
+            final_ext = "mp4"
+
+        filepath_guess = os.path.join(save_path, f"{job['title']}.{final_ext}")
+        if os.path.exists(filepath_guess):
+            self.notify(job, state="done", status="Play", filepath=filepath_guess)
+            return
+
+        job['progress'] = {'downloaded': 0, 'total': None, 'speed': None}
+        self.notify(job, state="running", status=f"Starting download ({height_desc})...")
+
+        ydl_opts = {
+            'format': fmt_str,
+            'outtmpl': f'{save_path}/%(title)s.%(ext)s',
+            'progress_hooks': [self._make_progress_hook(job, stop)],
+            'quiet': True,
+            'no_warnings': True,
+            'noprogress': True,            # <--- hide yt-dlp console progress
+            'ffmpeg_location': self.ffmpeg_location,
+            'noplaylist': True,
+            'ignoreerrors': True,
+            'http_chunk_size': 0,
+            'socket_timeout': 15,
+            'merge_output_format': 'mp4',
+            'continuedl': False,
+        }
+        if audio_only:
+            del ydl_opts['merge_output_format']
+            ydl_opts['postprocessors'] = [{'key': 'FFmpegExtractAudio', 'preferredcodec': final_ext}]
+
+        try:
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                info_dict = ydl.extract_info(url, download=True)
+                ext = final_ext if audio_only else info_dict.get('ext', 'mp4')
+                filename = os.path.join(save_path, f"{info_dict.get('title')}.{ext}")
+                if stop.is_set():
+                    self.notify(job, state="canceled", status="Canceled")
+                else:
+                    self.notify(job, state="done", status="Play", filepath=filename)
+        except Exception as e:
+            if stop.is_set():
+                self.notify(job, state="canceled", status="Canceled")
+                return
+            self.notify(job, state="error", status="Error")
+            self.on_error(job, e)
+
+    def _make_progress_hook(self, job, stop):
+        url = job["url"]
+        seen = {}  # filename -> bytes already counted against the limiter
+
+        def progress_hook(d):
+            if stop.is_set():
+                raise Exception("Canceled by user")
+
+            if d.get('status') == 'downloading':
+                # Numeric values (more consistent than _*_str fields)
+                downloaded = float(d.get('downloaded_bytes') or 0)
+                total = float(d.get('total_bytes') or d.get('total_bytes_estimate') or 0)
+                speed = d.get('speed')  # bytes/sec or None
+
+                fname = d.get('filename')
+                delta = downloaded - seen.get(fname, 0)
+                seen[fname] = downloaded
+                with self._cond:  # _report() sums these under the same lock
+                    self._speeds[url] = speed
+                job['progress'] = {'downloaded': int(downloaded), 'total': int(total) or None, 'speed': speed}
+                if delta > 0:
+                    self.limiter.consume(int(delta), stop)
+
+                # Percent
+                if total > 0:
+                    pct = downloaded / total * 100.0
+                    percent_str = f"{pct:.1f}%"
+                    total_str = sizeof_fmt(total)
+                else:
+                    percent_str = (d.get('_percent_str') or '0.0%').strip()
+                    total_str = "?"
+
+                # Speed (no padding)
+                speed_str = f"{sizeof_fmt(float(speed))}/s" if speed else "--/s"
+
+                # Final: 98.9% (127.5MiB/128.9MiB)  --  5.16MiB/s
+                self.notify(job, status=f"{percent_str} ({sizeof_fmt(downloaded)}/{total_str})  --  {speed_str}")
+
+            elif d.get('status') == 'finished':
+                self.notify(job, status="Processing...")
+
+        return progress_hook
@@ -0,0 +1,77 @@
+"""
+Tests for the extraction backends: pool recycling, broken-pool recovery and
+the format summary. Worker functions are top-level so spawn can pickle them.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction import ProcessExtractor, ThreadExtractor, _PoolExtractor, summarize_info  # noqa: E402
+
+
+def worker_pid(url):
+    return os.getpid()
+
+
+def die_on_request(url):
+    if url == "die":
+        os._exit(1)
+    return url, []
+
+
+def test_pool_base_is_abstract():
+    with pytest.raises(TypeError):
+        _PoolExtractor()
+
+
+def test_process_pool_is_recycled_after_budget():
+    extractor = ProcessExtractor(1, func=worker_pid, max_tasks_per_child=2)
+    try:
+        first = [extractor.fetch(f"u{i}") for i in range(2)]
+        pool = extractor._pool
+        third = extractor.fetch("u2")
+        assert extractor._pool is not pool
+        assert first[0] == first[1]
+        assert third != first[0]  # a fresh worker process
+    finally:
+        extractor.shutdown()
+
+
+def test_dead_worker_returns_empty_summary_and_recovers():
+    extractor = ProcessExtractor(2, func=die_on_request)
+    try:
+        assert extractor.fetch("die") == (None, [])
+        assert extractor.fetch("ok") == ("ok", [])
+        assert extractor.map(["a", "b"]) == [("a", []), ("b", [])]
+    finally:
+        extractor.shutdown()
+
+
+def test_thread_extractor_map_preserves_order():
+    extractor = ThreadExtractor(4, func=lambda url: (url.upper(), []))
+    try:
+        assert extractor.map(["a", "b", "c"]) == [("A", []), ("B", []), ("C", [])]
+    finally:
+        extractor.shutdown()
+
+
+def test_summarize_info_builds_highest_and_heights():
+    info = {
+        'title': "Clip",
+        'duration': 100,
+        'formats': [
+            {'height': 720, 'vcodec': 'avc1', 'acodec': 'none', 'filesize': 10 * 1024 * 1024},
+            {'height': 360, 'vcodec': 'avc1', 'acodec': 'none', 'tbr': 800},
+            {'vcodec': 'none', 'acodec': 'opus', 'filesize': 1024 * 1024},
+        ],
+    }
+    title, options = summarize_info(info)
+    assert title == "Clip"
+    assert [o['res'] for o in options] == ['Highest', '360p', '720p']
+    assert options[2]['size_bytes'] == 11 * 1024 * 1024
+    assert options[0]['size_bytes'] == options[2]['size_bytes']
+    # 800 kbit/s * 100 s = 10,000,000 bytes, plus the audio stream
+    assert options[1]['size_bytes'] == 10_000_000 + 1024 * 1024
@@ -0,0 +1,221 @@
+"""
+End-to-end test of the job API against a local stand-in media server.
+
+Serves temp media files with http.server and runs the real engine pieces
+(ThreadExtractor + DownloadScheduler + JobAPI on a free port), so yt-dlp
+downloads over loopback without touching the internet.
+"""
+import functools
+import http.server
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction import ThreadExtractor  # noqa: E402
+from job_api import JobAPI, load_token  # noqa: E402
+from scheduler import DownloadScheduler, Profile, ProfileSchedule  # noqa: E402
+
+KiB = 1024
+TOKEN = "test-token"
+EVENT_SETTLE_SECS = 0.5  # let the last SSE events arrive
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def media_server(tmp_path):
+    media = tmp_path / "media"
+    media.mkdir()
+    (media / "big.mp4").write_bytes(os.urandom(4096 * KiB))
+    (media / "small.mp4").write_bytes(os.urandom(64 * KiB))
+    (media / "other.mp4").write_bytes(os.urandom(64 * KiB))
+
+    server = http.server.ThreadingHTTPServer(
+        ('127.0.0.1', 0), functools.partial(_QuietHandler, directory=str(media)))
+    server.handle_error = lambda *args: None  # yt-dlp's probe requests hang up early
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def api(tmp_path):
+    out = tmp_path / "downloads"
+    out.mkdir()
+    # One job at a time, throttled, so a running job stays running long enough to cancel
+    schedule = ProfileSchedule([], Profile("Test", max_jobs=1, rate_limit=512 * KiB))
+    scheduler = DownloadScheduler(schedule, tick=0.1)
+    extractor = ThreadExtractor(4)
+    job_api = JobAPI(scheduler, extractor, [], lambda: str(out), token=TOKEN, port=0)
+    job_api.start()
+    yield job_api
+    scheduler.cancel()
+    job_api.stop()
+    extractor.shutdown()
+
+
+def call(api, method, path, data=None, headers=None):
+    body = json.dumps(data).encode() if data is not None else None
+    headers = {'X-Job-Token': TOKEN, 'Content-Type': 'application/json', **(headers or {})}
+    req = urllib.request.Request(f"http://127.0.0.1:{api.port}{path}", data=body, method=method,
+                                 headers={k: v for k, v in headers.items() if v is not None})
+    try:
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def wait_for(api, job_id, states, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        _, job = call(api, "GET", f"/jobs/{job_id}")
+        if job['state'] in states:
+            return job
+        time.sleep(0.05)
+    pytest.fail(f"job {job_id} never reached {states}; last: {job}")
+
+
+def test_submit_cancel_and_stream(api, media_server):
+    events = []
+
+    def listen():
+        req = urllib.request.Request(f"http://127.0.0.1:{api.port}/events", headers={'X-Job-Token': TOKEN})
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            for line in resp:
+                if line.startswith(b"data:"):
+                    events.append(json.loads(line[5:]))
+
+    threading.Thread(target=listen, daemon=True).start()
+    time.sleep(0.2)
+
+    urls = [f"{media_server}/{name}.mp4" for name in ("big", "small", "other")]
+    status, payload = call(api, "POST", "/jobs", {"url": urls[0]})
+    assert status == 202
+    big = payload['jobs'][0]['id']
+    assert payload['jobs'][0]['state'] == 'analyzing'
+
+    # max_jobs=1: once "big" runs (throttled), later submissions have to wait
+    wait_for(api, big, {'running'})
+    status, payload = call(api, "POST", "/jobs", {"urls": urls[1:]})
+    assert status == 202
+    small, other = (j['id'] for j in payload['jobs'])
+
+    # Dedupe: the same URL again returns the existing job
+    status, payload = call(api, "POST", "/jobs", {"url": urls[0]})
+    assert status == 202
+    assert payload['jobs'][0]['duplicate'] is True
+    assert payload['jobs'][0]['id'] == big
+
+    wait_for(api, other, {'queued'})
+    status, job = call(api, "DELETE", f"/jobs/{other}")
+    assert status == 200 and job['state'] == 'canceled'
+
+    status, _ = call(api, "POST", f"/jobs/{big}/cancel")
+    assert status == 200
+    assert wait_for(api, big, {'canceled', 'done', 'error'})['state'] == 'canceled'
+
+    done = wait_for(api, small, {'done', 'error'})
+    assert done['state'] == 'done'
+    assert os.path.isfile(done['filepath'])
+    assert done['progress']['percent'] == 100.0
+
+    # Finished jobs can't be canceled, and submitting them again is a no-op
+    status, payload = call(api, "DELETE", f"/jobs/{small}")
+    assert status == 409
+    assert call(api, "POST", "/jobs", {"url": urls[1]})[1]['jobs'][0]['duplicate'] is True
+
+    # A canceled job is analyzed and queued again
+    status, payload = call(api, "POST", "/jobs", {"url": urls[2]})
+    assert status == 202
+    assert payload['jobs'][0]['id'] == other and 'duplicate' not in payload['jobs'][0]
+    assert payload['jobs'][0]['state'] == 'analyzing'
+    assert wait_for(api, other, {'done', 'error'})['state'] == 'done'
+
+    time.sleep(EVENT_SETTLE_SECS)
+    seen = {(e['id'], e['state']) for e in events}
+    assert (big, 'running') in seen and (big, 'canceled') in seen
+    assert (other, 'canceled') in seen
+    assert (small, 'done') in seen
+    assert (other, 'done') in seen
+
+
+def test_cancel_all_does_not_block_later_jobs(api, media_server):
+    status, payload = call(api, "POST", "/jobs", {"url": f"{media_server}/big.mp4"})
+    big = payload['jobs'][0]['id']
+    wait_for(api, big, {'running'})
+
+    api.scheduler.cancel()  # the GUI's Cancel
+    status, payload = call(api, "POST", "/jobs", {"url": f"{media_server}/small.mp4"})
+    small = payload['jobs'][0]['id']
+    assert wait_for(api, big, {'canceled', 'done', 'error'})['state'] == 'canceled'
+    assert wait_for(api, small, {'done', 'error', 'idle'})['state'] == 'done'
+
+
+def test_failed_job_can_be_resubmitted(api, media_server):
+    url = f"{media_server}/missing.mp4"
+    job = call(api, "POST", "/jobs", {"url": url})[1]['jobs'][0]
+    assert wait_for(api, job['id'], {'error'})
+
+    again = call(api, "POST", "/jobs", {"url": url})[1]['jobs'][0]
+    assert again['id'] == job['id'] and again['state'] == 'analyzing'
+    assert wait_for(api, job['id'], {'error'})
+    assert len(call(api, "GET", "/jobs")[1]['jobs']) == 1
+
+
+def test_error_paths(api):
+    assert call(api, "GET", "/jobs/nope") == (404, {'error': "No job with id 'nope'"})
+    assert call(api, "GET", "/nowhere")[0] == 404
+    assert call(api, "PUT", "/jobs")[0] == 405
+    assert call(api, "POST", "/jobs", {"urls": []})[0] == 400
+
+    with socket.create_connection(('127.0.0.1', api.port), timeout=5) as sock:
+        sock.sendall(b"GARBAGE\r\n\r\n")
+        assert sock.recv(1024).startswith(b"HTTP/1.1 400 ")
+
+    with socket.create_connection(('127.0.0.1', api.port), timeout=5) as sock:
+        sock.sendall(b"POST /jobs HTTP/1.1\r\nContent-Length: lots\r\n\r\n")
+        assert sock.recv(1024).startswith(b"HTTP/1.1 400 ")
+
+
+def test_rejects_foreign_requests(api):
+    payload = {"url": "http://127.0.0.1:1/never.mp4"}
+    # DNS rebinding: the browser sends the attacker's host name
+    assert call(api, "GET", "/jobs", headers={'Host': "evil.example:8765"})[0] == 403
+    assert call(api, "GET", "/jobs", headers={'Host': "127.0.0.1:1"})[0] == 403
+    assert call(api, "GET", "/jobs", headers={'Host': f"localhost:{api.port}"})[0] == 200
+    # Any browser-originated request carries an Origin
+    assert call(api, "POST", "/jobs", payload, headers={'Origin': "http://evil.example"})[0] == 403
+    assert call(api, "GET", "/jobs", headers={'Origin': "null"})[0] == 403
+    # Form-style "simple" POSTs
+    assert call(api, "POST", "/jobs", payload, headers={'Content-Type': "text/plain"})[0] == 415
+    assert call(api, "POST", "/jobs", payload,
+                headers={'Content-Type': "application/x-www-form-urlencoded"})[0] == 415
+    assert call(api, "DELETE", "/jobs/nope", headers={'Content-Type': None})[0] == 415
+    # Token
+    assert call(api, "GET", "/jobs", headers={'X-Job-Token': None})[0] == 401
+    assert call(api, "GET", "/jobs", headers={'X-Job-Token': "wrong"})[0] == 401
+    assert call(api, "GET", "/events", headers={'X-Job-Token': None})[0] == 401
+    assert call(api, "GET", "/jobs")[1] == {'jobs': []}
+
+
+def test_load_token_creates_private_file_once(tmp_path):
+    path = tmp_path / "api_token.txt"
+    token = load_token(str(path))
+    assert len(token) >= 32
+    assert load_token(str(path)) == token
+    if os.name == 'posix':
+        assert path.stat().st_mode & 0o777 == 0o600
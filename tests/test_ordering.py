@@ -0,0 +1,66 @@
+"""
+Tests for the queue ordering policies and pick_next.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ordering import AGING_BYTES_PER_SEC, AGING_UNKNOWN_SIZE, pick_next  # noqa: E402
+
+MiB = 1024 * 1024
+NOW = 1000.0
+
+
+def job(seq, size=None, queued_at=NOW, pinned=None):
+    return {'seq': seq, 'size_bytes': size, 'queued_at': queued_at, 'pinned': pinned}
+
+
+@pytest.mark.parametrize("policy", ["fifo", "sjf", "largest", "aging"])
+def test_pinned_jobs_run_first_in_pin_order(policy):
+    queue = [job(0, 1 * MiB), job(1, 900 * MiB, pinned=7), job(2, 5 * MiB, pinned=3), job(3, None)]
+    assert pick_next(queue, policy, NOW) == 2
+    del queue[2]
+    assert pick_next(queue, policy, NOW) == 1
+
+
+def test_fifo_follows_seq_after_swaps():
+    queue = [job(0), job(1), job(2)]
+    assert pick_next(queue, "fifo", NOW) == 0
+    # "Down" on the first row swaps its seq with the next one
+    queue[0]['seq'], queue[1]['seq'] = queue[1]['seq'], queue[0]['seq']
+    assert pick_next(queue, "fifo", NOW) == 1
+    # "Up" on the last row
+    queue[2]['seq'], queue[1]['seq'] = queue[1]['seq'], queue[2]['seq']
+    assert pick_next(queue, "fifo", NOW) == 2
+
+
+def test_shortest_first_breaks_ties_by_seq_and_puts_unknown_last():
+    queue = [job(3, 10 * MiB), job(1, 10 * MiB), job(0, None), job(2, 50 * MiB)]
+    assert pick_next(queue, "sjf", NOW) == 1
+    assert pick_next([job(0, None), job(1, 50 * MiB)], "sjf", NOW) == 1
+
+
+def test_largest_first_breaks_ties_by_seq_and_puts_unknown_last():
+    queue = [job(3, 50 * MiB), job(1, 50 * MiB), job(0, None), job(2, 10 * MiB)]
+    assert pick_next(queue, "largest", NOW) == 1
+    assert pick_next([job(0, None), job(1, 1)], "largest", NOW) == 1
+
+
+def test_aging_lets_a_long_wait_overtake_smaller_jobs():
+    big = job(0, 2048 * MiB, queued_at=NOW)
+    small = job(1, 30 * MiB, queued_at=NOW)
+    assert pick_next([big, small], "aging", NOW) == 1
+    # Once the size gap is covered by waiting time, the big job goes first
+    catch_up = (2048 - 30) * MiB / AGING_BYTES_PER_SEC
+    fresh_small = job(1, 30 * MiB, queued_at=NOW + catch_up + 1)
+    assert pick_next([big, fresh_small], "aging", NOW + catch_up + 1) == 0
+
+
+def test_aging_promotes_jobs_with_unknown_size():
+    unknown = job(0, None, queued_at=NOW)
+    assert pick_next([unknown, job(1, 30 * MiB)], "aging", NOW) == 1
+    later = NOW + AGING_UNKNOWN_SIZE / AGING_BYTES_PER_SEC + 1
+    assert pick_next([unknown, job(1, 30 * MiB, queued_at=later)], "aging", later) == 0
@@ -0,0 +1,211 @@
+"""
+Tests for the bandwidth/concurrency profiles: time windows, config parsing,
+the shared RateLimiter and batch cancel in the scheduler.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, time as dtime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import (  # noqa: E402
+    DownloadScheduler, Profile, ProfileSchedule, RateLimiter, load_schedule, parse_rate, parse_window,
+)
+
+FALLBACK = ProfileSchedule([], Profile("Fallback", max_jobs=3))
+
+
+def at(hour, minute=0):
+    return datetime(2024, 1, 1, hour, minute)
+
+
+def test_profile_covers_same_day_window():
+    office = Profile("Office", start=dtime(8), end=dtime(18))
+    assert office.covers(at(8))
+    assert office.covers(at(17, 59))
+    assert not office.covers(at(18))
+    assert not office.covers(at(7, 59))
+
+
+def test_profile_covers_window_wrapping_past_midnight():
+    night = Profile("Night", start=dtime(22), end=dtime(6))
+    assert night.covers(at(22))
+    assert night.covers(at(23, 59))
+    assert night.covers(at(0))
+    assert night.covers(at(5, 59))
+    assert not night.covers(at(6))
+    assert not night.covers(at(12))
+
+
+def test_unwindowed_profile_always_covers_and_schedule_falls_back():
+    night = Profile("Night", start=dtime(22), end=dtime(6))
+    schedule = ProfileSchedule([night], Profile("Day"))
+    assert Profile("Any").covers(at(12))
+    assert schedule.active(at(23)) is night
+    assert schedule.active(at(12)).name == "Day"
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None),
+    ("", None),
+    ("Unlimited", None),
+    (1048576, 1048576),
+    (2.5, 2),
+    ("800", 800),
+    ("800K", 800_000),
+    ("5MiB", 5 * 1024 ** 2),
+    ("1.5 mib/s", int(1.5 * 1024 ** 2)),
+    ("2GB", 2 * 1000 ** 3),
+])
+def test_parse_rate(value, expected):
+    assert parse_rate(value) == expected
+
+
+@pytest.mark.parametrize("value", [0, -1, -0.5, "0", "0MiB", "-5MiB", "fast", "5XB", ".", "1.2.3M"])
+def test_parse_rate_rejects_invalid_and_non_positive(value):
+    with pytest.raises(ValueError):
+        parse_rate(value)
+
+
+def test_parse_window():
+    assert parse_window("08:00-18:00") == (dtime(8), dtime(18))
+    assert parse_window(" 8:30 - 18:15 ") == (dtime(8, 30), dtime(18, 15))
+    assert parse_window("22:00-06:00") == (dtime(22), dtime(6))
+    for bad in ("08:00", "8-18", "25:00-26:00", "noon-night"):
+        with pytest.raises(ValueError):
+            parse_window(bad)
+
+
+def write_profiles(tmp_path, data):
+    path = tmp_path / "profiles.json"
+    path.write_text(data if isinstance(data, str) else json.dumps(data), encoding='utf-8')
+    return str(path)
+
+
+def test_load_schedule(tmp_path):
+    assert load_schedule(str(tmp_path / "missing.json"), FALLBACK) is FALLBACK
+
+    path = write_profiles(tmp_path, {
+        "profiles": [{"name": "Office", "window": "08:00-18:00", "jobs": 2, "rate": "5MiB"}],
+    })
+    schedule = load_schedule(path, FALLBACK)
+    assert schedule.default is FALLBACK.default
+    assert schedule.active(at(9)) == Profile("Office", 2, 5 * 1024 ** 2, dtime(8), dtime(18))
+
+
+@pytest.mark.parametrize("data", [
+    "{not json",
+    [],                                                     # not an object
+    {"profiles": {"name": "x"}},                            # profiles not a list
+    {"profiles": ["08:00-18:00"]},                          # entry not an object
+    {"profiles": [{"window": "8am-6pm"}]},
+    {"profiles": [{"window": "08:00-18:00", "jobs": "two"}]},
+    {"profiles": [{"window": "08:00-18:00", "rate": "-1M"}]},
+    {"default": {"jobs": 2, "rate": "lots"}},
+])
+def test_load_schedule_rejects_malformed_files(tmp_path, data):
+    with pytest.raises(ValueError):
+        load_schedule(write_profiles(tmp_path, data), FALLBACK)
+
+
+def test_load_schedule_unreadable_path_raises_oserror(tmp_path):
+    path = tmp_path / "profiles.json"
+    path.write_text("{}", encoding='utf-8')
+    path.chmod(0)
+    if os.access(path, os.R_OK):
+        pytest.skip("running with permissions that ignore file modes")
+    with pytest.raises(OSError):
+        load_schedule(str(path), FALLBACK)
+
+
+def test_rate_limiter_throughput():
+    rate = 200_000
+    limiter = RateLimiter(rate)
+    chunk = 10_000
+    start = time.monotonic()
+    for _ in range(40):  # 400 KB: the first chunk is free, the rest take ~1.95 s
+        limiter.consume(chunk)
+    elapsed = time.monotonic() - start
+    assert 1.8 <= elapsed < 3.0
+
+
+def test_rate_limiter_unlimited_never_blocks():
+    limiter = RateLimiter(None)
+    start = time.monotonic()
+    for _ in range(1000):
+        limiter.consume(10 ** 9)
+    assert time.monotonic() - start < 0.5
+
+
+def test_set_rate_wakes_sleeping_consumer():
+    limiter = RateLimiter(1000)
+    limiter.consume(10_000)  # the next slot is now ~10 s away
+    finished = threading.Event()
+
+    def consume():
+        limiter.consume(1000)
+        finished.set()
+
+    threading.Thread(target=consume, daemon=True).start()
+    time.sleep(0.2)
+    assert not finished.is_set()
+    limiter.set_rate(None)
+    assert finished.wait(0.5)
+
+
+def test_consume_returns_on_cancel():
+    limiter = RateLimiter(1000)
+    limiter.consume(10_000)
+    cancel = threading.Event()
+    finished = threading.Event()
+
+    def consume():
+        limiter.consume(1000, cancel)
+        finished.set()
+
+    threading.Thread(target=consume, daemon=True).start()
+    time.sleep(0.2)
+    cancel.set()
+    limiter.wake()
+    assert finished.wait(0.5)
+
+
+class _FakeDownloads(DownloadScheduler):
+    """Jobs named 'slow...' run until stopped and take a moment to wind down; others finish at once."""
+
+    def _run_job(self, job, stop):
+        self.notify(job, state="running", status="Downloading")
+        if job['url'].startswith("slow"):
+            stop.wait(5)
+            time.sleep(0.3)
+        if stop.is_set():
+            self.notify(job, state="canceled", status="Canceled")
+        else:
+            self.notify(job, state="done", status="Play")
+
+
+def wait_state(job, states, timeout=5):
+    deadline = time.monotonic() + timeout
+    while job.get('state') not in states and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job.get('state')
+
+
+def test_cancel_only_affects_jobs_queued_or_running_at_the_time():
+    scheduler = _FakeDownloads(ProfileSchedule([], Profile("One", max_jobs=1)), tick=0.05)
+    slow, waiting, later = {'url': "slow-1"}, {'url': "quick-1"}, {'url': "quick-2"}
+    scheduler.start([slow, waiting], "/tmp")
+    assert wait_state(slow, {'running'}) == 'running'
+
+    scheduler.cancel()
+    assert waiting['state'] == 'idle' and waiting['status'] == "Ready"
+    # Queued while "slow-1" is still winding down: must still run
+    scheduler.start([later], "/tmp")
+    assert wait_state(later, {'done', 'idle'}) == 'done'
+    assert wait_state(slow, {'canceled', 'done'}) == 'canceled'
+    assert waiting['state'] == 'idle'